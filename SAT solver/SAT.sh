@@ -3,6 +3,7 @@
 h=$1
 h=${h: -1}
 puzzle=$2
+shift 2
 
 if [ "$h" = "2" ]; then
     heuristic="MOMS"
@@ -15,6 +16,15 @@ then
 elif [ "$h" = "5" ]
 then
     heuristic="nishio"
+elif [ "$h" = "6" ]
+then
+    heuristic="CDCL"
+elif [ "$h" = "7" ]
+then
+    heuristic="VSIDS"
+elif [ "$h" = "8" ]
+then
+    heuristic="portfolio"
 else
     heuristic="random"
 fi
@@ -22,4 +32,4 @@ fi
 echo "$puzzle"
 echo "$heuristic"
 
-python SAT.py "$heuristic" "$puzzle"
+python SAT.py "$heuristic" "$puzzle" "$@"
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+'''
+    A propagation backend for N x N sudokus that keeps the candidates of every
+    cell as an integer bitmask, instead of the rules as clauses.
+
+    As CNF, the rules of a 25 x 25 sudoku are over 750000 clauses, nearly all
+    of them binary clauses saying that two cells or two values exclude each
+    other (see grid.py). SudokuFormula is a WatchedFormula that holds none of
+    them. Instead, bit v - 1 of candidates[cell] is set while value v is still
+    possible in the cell, and bit p of places[unit][v] while the cell at
+    position p of a row, column or box still can hold v. Assigning a variable
+    false clears one bit in the cell and in each of its three units, and undo
+    sets it again. Propagation then only has to look at these numbers:
+
+    - a value placed in a cell is removed from the other values of the cell
+      and from the cells it sees;
+    - a cell with one candidate left gets that value (a naked single), and a
+      unit with one place left for a value gets it there (a hidden single);
+    - a cell without candidates, or a unit without a place for a value, is a
+      conflict.
+
+    The reason of every implication, and the explanation of a conflict, is a
+    tuple of false literals, as for the constraints in watched.py, so CDCL can
+    analyse them. The clauses that one value of every cell, and every value in
+    every unit, are true (4 * N * N clauses of N literals) are kept in the
+    clause database without being watched, so the heuristics of dpll.py score
+    them as usual. Learned clauses are added and watched as in any formula.
+'''
+
+from budget import UNKNOWN
+from cdcl import CDCL_algorithm
+from dpll import DP_algorithm
+from grid import grid_size, groups, puzzle_givens, solution_string, units, variable
+from watched import WatchedFormula
+
+
+class SudokuFormula(WatchedFormula):
+
+    '''The rules of an N x N sudoku, propagated with bitmasks.'''
+
+    def __init__(self, size=9):
+
+        WatchedFormula.__init__(self, ())
+
+        self.size = size
+        cells = size * size
+        full = (1 << size) - 1
+
+        # the variables of every cell, by value; the index 0 is unused
+        self.cell_variables = [[0] + [variable(row, column, value, size) for value in range(1, size + 1)]
+                               for row in range(1, size + 1) for column in range(1, size + 1)]
+
+        # the cell and value of every variable
+        self.grid_variables = {}
+
+        for cell, variables in enumerate(self.cell_variables):
+            for value in range(1, size + 1):
+                self.grid_variables[variables[value]] = (cell, value)
+
+        # the cells of every unit, and the units of every cell with its
+        # position in them
+        self.unit_cells = [[(row - 1) * size + column - 1 for row, column in unit] for unit in units(size)]
+        self.cell_units = [[] for cell in range(cells)]
+
+        for unit, members in enumerate(self.unit_cells):
+            for position, cell in enumerate(members):
+                self.cell_units[cell].append((unit, position))
+
+        # the values still possible per cell, and the places still possible
+        # per unit and value, as bitmasks
+        self.candidates = [full] * cells
+        self.places = [[full] * (size + 1) for unit in self.unit_cells]
+
+        # trail position up to which assignments have been propagated here
+        self.grid_propagated = 0
+
+        # the clauses that every cell has a value and every unit every value,
+        # for the heuristics only: they are propagated by the bitmasks
+        for group in groups(size):
+            self.clauses.add(group)
+
+    def constrains(self, literal):
+
+        '''Whether a literal occurs in the rules of the grid.'''
+
+        return literal in self.grid_variables or WatchedFormula.constrains(self, literal)
+
+    def assign(self, literal, reason=None):
+
+        WatchedFormula.assign(self, literal, reason)
+
+        if literal < 0 and -literal in self.grid_variables:
+
+            cell, value = self.grid_variables[-literal]
+            bit = 1 << (value - 1)
+
+            self.candidates[cell] &= ~bit
+
+            for unit, position in self.cell_units[cell]:
+                self.places[unit][value] &= ~(1 << position)
+
+    def undo(self, position):
+
+        grid_variables = self.grid_variables
+
+        for literal in self.trail[position:]:
+
+            if literal < 0 and -literal in grid_variables:
+
+                cell, value = grid_variables[-literal]
+                self.candidates[cell] |= 1 << (value - 1)
+
+                for unit, place in self.cell_units[cell]:
+                    self.places[unit][value] |= 1 << place
+
+        WatchedFormula.undo(self, position)
+
+        self.grid_propagated = min(self.grid_propagated, position)
+
+    def propagate(self):
+
+        '''Propagate the clauses and constraints, and the grid, until nothing
+        changes. Returns the conflict, as WatchedFormula.propagate does.'''
+
+        trail = self.trail
+
+        while True:
+
+            conflict = WatchedFormula.propagate(self)
+
+            if conflict is not None:
+                return conflict
+
+            if self.grid_propagated == len(trail):
+                return None
+
+            # new assignments here go back through the watches first
+            while self.grid_propagated < len(trail):
+
+                literal = trail[self.grid_propagated]
+                self.grid_propagated += 1
+
+                conflict = self.propagate_grid(literal)
+
+                if conflict is not None:
+                    self.conflict = conflict
+                    return conflict
+
+    def propagate_grid(self, literal):
+
+        '''The consequences of one assignment for the grid. Returns the
+        explanation of a conflict, or None.'''
+
+        entry = self.grid_variables.get(abs(literal))
+
+        if entry is None:
+            return None
+
+        cell, value = entry
+        true_literals = self.true_literals
+        cell_variables = self.cell_variables
+
+        if literal > 0:
+
+            # the other values still possible in the cell, and the other
+            # places still possible for the value in its units; only those
+            # have bits left to clear
+            reason = (-literal,)
+            variables = cell_variables[cell]
+            mask = self.candidates[cell] & ~(1 << (value - 1))
+
+            while mask:
+
+                bit = mask & -mask
+                mask ^= bit
+                other = variables[bit.bit_length()]
+
+                if other in true_literals:
+                    return (-literal, -other)
+
+                self.assign(-other, reason)
+
+            for unit, position in self.cell_units[cell]:
+
+                # read again for every unit, as a row and a box share cells
+                places = self.places[unit][value] & ~(1 << position)
+                members = self.unit_cells[unit]
+
+                while places:
+
+                    bit = places & -places
+                    places ^= bit
+                    other = cell_variables[members[bit.bit_length() - 1]][value]
+
+                    if other in true_literals:
+                        return (-literal, -other)
+
+                    self.assign(-other, reason)
+
+            return None
+
+        # the cell may have one value left, or none
+        mask = self.candidates[cell]
+
+        if mask == 0:
+            return tuple(cell_variables[cell][1:])
+
+        if mask & (mask - 1) == 0:
+
+            single = cell_variables[cell][mask.bit_length()]
+
+            if single not in true_literals:
+                self.assign(single, tuple(other for other in cell_variables[cell][1:] if other != single))
+
+        # and so may the units of the cell for the value
+        for unit, position in self.cell_units[cell]:
+
+            places = self.places[unit][value]
+            members = self.unit_cells[unit]
+
+            if places == 0:
+                return tuple(cell_variables[member][value] for member in members)
+
+            if places & (places - 1) == 0:
+
+                single = cell_variables[members[places.bit_length() - 1]][value]
+
+                if single not in true_literals:
+                    self.assign(single, tuple(cell_variables[member][value] for member in members
+                                              if cell_variables[member][value] != single))
+
+        return None
+
+
+def solve_grid(puzzle, heuristic="CDCL", metrics=None, budget=None, backend=None):
+
+    '''Solve an N x N puzzle string with the bitmask backend and a heuristic
+    of dpll.py, or CDCL. Returns the solution as a string, None if the puzzle
+    has no solution, or UNKNOWN (also None) if the budget ran out.'''
+
+    puzzle = puzzle.strip()
+    size = grid_size(puzzle)
+    solution = solve_givens(puzzle_givens(puzzle, size), size, heuristic, metrics, budget, backend)
+
+    if solution is UNKNOWN or not solution:
+        return None
+
+    return solution_string(solution, size)
+
+
+def solve_givens(givens, size, heuristic="CDCL", metrics=None, budget=None, backend=None):
+
+    '''Solve an N x N sudoku given as the literals of its givens. Returns the
+    assigned literals, an empty list if there is no solution, or UNKNOWN.'''
+
+    formula = SudokuFormula(size)
+
+    if heuristic == "CDCL":
+        return CDCL_algorithm(formula, metrics, givens, budget=budget)
+
+    return DP_algorithm(formula, heuristic, metrics, givens, backend=backend, budget=budget)
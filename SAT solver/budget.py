@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+'''
+    Limits on a single search: wall-clock time, decisions, conflicts and
+    memory.
+
+    The search checks its budget at every decision and every conflict. Once a
+    limit is reached, it stops and returns UNKNOWN instead of a solution or an
+    empty list, so that one hard puzzle cannot stall a batch. The formula is
+    left as it is at that point, and can be undone as after any other search.
+
+        budget = Budget(seconds=10, conflicts=100000)
+        solution = solve(ruleset, "random", budget=budget)
+        if solution is UNKNOWN:
+            print('Ran out of ' + budget.exhausted)
+'''
+
+import os
+import resource
+import time
+
+# the outcome of a search that ran out of budget, next to a solution (the
+# assigned literals) and an empty list for unsatisfiable
+UNKNOWN = None
+
+# the number of decisions and conflicts between two looks at the memory use
+MEMORY_INTERVAL = 64
+
+
+class Budget(object):
+
+    '''The limits of one search; a limit of None means no limit. Memory is the
+    current resident size of the process in megabytes, so in a process that
+    solves many puzzles, what an earlier search used and freed again does
+    not count against a later one.
+
+    The same budget may be used for many searches: each search starts it
+    again. Afterwards, exhausted names the limit that was reached, if any.'''
+
+    def __init__(self, seconds=None, decisions=None, conflicts=None, memory=None):
+
+        self.seconds = seconds
+        self.decisions = decisions
+        self.conflicts = conflicts
+        self.memory = memory
+
+        self.start()
+
+    def start(self):
+
+        '''Reset the clock and the counts, at the start of a search.'''
+
+        self.started = time.perf_counter()
+        self.decision_count = 0
+        self.conflict_count = 0
+        self.exhausted = None
+
+    def decision(self):
+
+        '''Count a decision. Returns True if the search has to stop.'''
+
+        self.decision_count += 1
+
+        if self.decisions is not None and self.decision_count > self.decisions:
+            self.exhausted = 'decisions'
+            return True
+
+        return self.spent()
+
+    def conflict(self):
+
+        '''Count a conflict. Returns True if the search has to stop.'''
+
+        self.conflict_count += 1
+
+        if self.conflicts is not None and self.conflict_count > self.conflicts:
+            self.exhausted = 'conflicts'
+            return True
+
+        return self.spent()
+
+    def spent(self):
+
+        '''Whether the time or memory limit has been reached.'''
+
+        if self.seconds is not None and time.perf_counter() - self.started > self.seconds:
+            self.exhausted = 'time'
+            return True
+
+        if self.memory is not None and (self.decision_count + self.conflict_count) % MEMORY_INTERVAL == 0:
+
+            if resident_memory() > self.memory:
+                self.exhausted = 'memory'
+                return True
+
+        return False
+
+
+def resident_memory():
+
+    '''The current resident size of the process in megabytes. Without /proc,
+    the peak resident size is the best there is.'''
+
+    try:
+        with open('/proc/self/statm') as file:
+            pages = int(file.read().split()[1])
+
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1 << 20)
+
+    # in kilobytes on Linux
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def parse_budget(options):
+
+    '''A Budget from options such as time=10 or conflicts=1000, or None if
+    none of them is a limit. Returns the budget and the other options.'''
+
+    limits = {}
+    others = []
+
+    names = {'time': ('seconds', float), 'decisions': ('decisions', int),
+             'conflicts': ('conflicts', int), 'memory': ('memory', float)}
+
+    for option in options:
+
+        name, _, value = option.partition('=')
+
+        if name in names and value:
+            keyword, kind = names[name]
+            limits[keyword] = kind(value)
+        else:
+            others.append(option)
+
+    return (Budget(**limits) if limits else None), others
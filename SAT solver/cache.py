@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+'''
+    A cache of sudoku solutions that also recognises a puzzle it has seen in
+    another guise.
+
+    Relabelling the values, reordering the rows within a band, the bands,
+    the columns within a stack and the stacks, and transposing all turn a
+    sudoku into an equivalent one, whose solution is the old solution put
+    through the same transformation. The collections hold many puzzles that
+    are equivalent in this way. canonical_form picks one representative of
+    every such class, the same for all its members: of all transformations,
+    the one that gives the smallest string when the values are numbered in
+    order of first appearance. The solution is cached in the frame of that
+    representative, and mapped back to the frame of each puzzle it is asked
+    for.
+
+    Trying all 2 * 6^8 orderings of rows and columns would take far longer
+    than a search. Instead, rows and bands are first sorted by properties
+    that no transformation changes, such as their number of givens and how
+    often their values occur in the whole puzzle; columns and stacks the
+    same way. Only orderings among rows or columns that tie on these are
+    tried. Up to MAX_ORDERINGS of them; past that, as for a nearly empty
+    grid, the first is taken, which is still a correct key, if not one
+    that every equivalent puzzle shares.
+
+    SolutionCache keeps the solutions in a bounded LRU in memory and,
+    optionally, in a shelve file on disk.
+
+        cache = SolutionCache(filename='solutions.db')
+        solution = cache.solve(puzzle, lambda puzzle: solve_sudoku(puzzle, 'CDCL'))
+'''
+
+import itertools
+import shelve
+from collections import Counter, OrderedDict
+
+from grid import SYMBOLS, grid_size
+
+# the number of solutions kept in memory
+CAPACITY = 10000
+
+# the number of row and column orderings tried for a canonical form
+MAX_ORDERINGS = 2000
+
+
+def canonical_form(puzzle):
+
+    '''The canonical form of a puzzle string, with the transformation that
+    takes the puzzle there: whether it is transposed, the order of its rows
+    and of its columns, and the new value of every value.'''
+
+    puzzle = puzzle.strip()
+    size = grid_size(puzzle)
+    values = [SYMBOLS.find(symbol, 0, size) + 1 for symbol in puzzle]
+    grid = [values[row * size:(row + 1) * size] for row in range(size)]
+
+    frequencies = Counter(value for value in values if value)
+    best = None
+
+    for transposed in (False, True):
+
+        cells = [list(column) for column in zip(*grid)] if transposed else grid
+
+        row_orders = list(orderings(cells, frequencies))
+        column_orders = list(orderings([list(column) for column in zip(*cells)], frequencies))
+
+        # too many ties to try them all
+        if len(row_orders) * len(column_orders) > MAX_ORDERINGS:
+            row_orders, column_orders = row_orders[:1], column_orders[:1]
+
+        for rows in row_orders:
+            for columns in column_orders:
+
+                key, labels = relabelled(cells, rows, columns)
+
+                if best is None or key < best[0]:
+                    best = key, (transposed, rows, columns, labels)
+
+    return best
+
+
+def orderings(lines, frequencies):
+
+    '''The orders of the rows of a grid (or of its columns, given as rows)
+    that are sorted by band and by row on properties that the other
+    transformations keep.'''
+
+    size = len(lines)
+    box = int(round(size ** 0.5))
+
+    # per row: its givens, its givens per box, and how often its values
+    # occur in the whole puzzle
+    signatures = []
+
+    for line in lines:
+        counts = sorted(sum(1 for value in line[start:start + box] if value) for start in range(0, size, box))
+        signatures.append((sum(counts), tuple(counts), tuple(sorted(frequencies[value] for value in line if value))))
+
+    # per band: its rows, and its givens per box
+    bands = []
+
+    for start in range(0, size, box):
+        rows = sorted(range(start, start + box), key=lambda row: signatures[row])
+        counts = sorted(sum(1 for row in rows for value in lines[row][column:column + box] if value)
+                        for column in range(0, size, box))
+        bands.append(((tuple(signatures[row] for row in rows), tuple(counts)), rows))
+
+    bands.sort(key=lambda band: band[0])
+
+    # the bands, and the rows within every band, that tie can go in any order
+    choices = [tied_orders([signature for signature, rows in bands])]
+    choices.extend(tied_orders([signatures[row] for row in rows]) for signature, rows in bands)
+
+    for band_order, *row_orders in itertools.product(*choices):
+        yield tuple(bands[band][1][row] for band in band_order for row in row_orders[band])
+
+
+def tied_orders(keys):
+
+    '''The orders of positions with sorted keys in which equal keys may be
+    swapped, as tuples of positions.'''
+
+    groups = [list(group) for key, group in itertools.groupby(range(len(keys)), key=lambda position: keys[position])]
+
+    return [tuple(itertools.chain(*order))
+            for order in itertools.product(*(itertools.permutations(group) for group in groups))]
+
+
+def relabelled(cells, rows, columns):
+
+    '''The string of a grid with its rows and columns in the given order, and
+    its values numbered in order of first appearance. Returns the string and
+    the new number of every value.'''
+
+    labels = {}
+    symbols = []
+
+    for row in rows:
+        line = cells[row]
+
+        for column in columns:
+            value = line[column]
+
+            if value:
+                if value not in labels:
+                    labels[value] = len(labels) + 1
+
+                symbols.append(SYMBOLS[labels[value] - 1])
+
+            else:
+                symbols.append('.')
+
+    return ''.join(symbols), labels
+
+
+def all_labels(labels, size):
+
+    '''The relabelling of every value, with the values that are not in the
+    puzzle taking the remaining labels in order.'''
+
+    labels = dict(labels)
+    free = iter(sorted(set(range(1, size + 1)) - set(labels.values())))
+
+    for value in range(1, size + 1):
+        if value not in labels:
+            labels[value] = next(free)
+
+    return labels
+
+
+def to_canonical(solution, transform):
+
+    '''A solution string in the frame of the puzzle, put in the frame of its
+    canonical form.'''
+
+    transposed, rows, columns, labels = transform
+    size = len(rows)
+    labels = all_labels(labels, size)
+
+    values = [SYMBOLS.find(symbol, 0, size) + 1 for symbol in solution]
+    grid = [values[row * size:(row + 1) * size] for row in range(size)]
+
+    if transposed:
+        grid = [list(column) for column in zip(*grid)]
+
+    return ''.join(SYMBOLS[labels[grid[row][column]] - 1] for row in rows for column in columns)
+
+
+def from_canonical(solution, transform):
+
+    '''A solution string in the frame of a canonical form, put back in the
+    frame of the puzzle.'''
+
+    transposed, rows, columns, labels = transform
+    size = len(rows)
+    values = dict((label, value) for value, label in all_labels(labels, size).items())
+
+    grid = [[0] * size for row in range(size)]
+
+    for position, symbol in enumerate(solution):
+        row, column = divmod(position, size)
+        grid[rows[row]][columns[column]] = values[SYMBOLS.index(symbol) + 1]
+
+    if transposed:
+        grid = [list(column) for column in zip(*grid)]
+
+    return ''.join(SYMBOLS[value - 1] for line in grid for value in line)
+
+
+class SolutionCache(object):
+
+    '''Solutions by canonical form, the most recently used CAPACITY of them in
+    memory, and all of them in a shelve file if a filename is given. A puzzle
+    without a solution is cached as well, as an empty string.'''
+
+    def __init__(self, capacity=CAPACITY, filename=None):
+
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.store = shelve.open(filename) if filename else None
+
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+
+        '''The cached solution of a canonical form, or None.'''
+
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        if self.store is not None and key in self.store:
+            solution = self.store[key]
+            self.remember(key, solution)
+            return solution
+
+        return None
+
+    def remember(self, key, solution):
+
+        self.entries[key] = solution
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def get(self, puzzle):
+
+        '''The solution of a puzzle or of an equivalent one, in the frame of
+        the puzzle; an empty string if it has none, or None if neither has
+        been seen.'''
+
+        key, transform = canonical_form(puzzle)
+
+        return self.found(self.lookup(key), transform)
+
+    def put(self, puzzle, solution):
+
+        '''Cache the solution of a puzzle, or None if it has none.'''
+
+        key, transform = canonical_form(puzzle)
+        self.add(key, transform, solution)
+
+    def solve(self, puzzle, solver):
+
+        '''The solution of a puzzle from the cache, or else from solver(puzzle),
+        which is cached. Returns None if the puzzle has no solution.'''
+
+        key, transform = canonical_form(puzzle)
+        solution = self.found(self.lookup(key), transform)
+
+        if solution is None:
+            solution = solver(puzzle)
+            self.add(key, transform, solution)
+
+        return solution or None
+
+    def found(self, cached, transform):
+
+        if cached is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        return from_canonical(cached, transform) if cached else ''
+
+    def add(self, key, transform, solution):
+
+        cached = to_canonical(solution, transform) if solution else ''
+
+        self.remember(key, cached)
+
+        if self.store is not None:
+            self.store[key] = cached
+
+    def __len__(self):
+
+        return len(self.entries)
+
+    def close(self):
+
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        self.close()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+'''
+    Detection of at-most-one constraints in a CNF ruleset.
+
+    An at-most-one constraint over n literals is commonly written as n(n-1)/2
+    binary clauses, one per pair: -a -b 0 says that a and b are not both true.
+    In the sudoku rules, that is 36 clauses for every cell, row, column and
+    box, and most of the clauses in the file. Every pair of literals is a
+    clause of its own for unit propagation as well, so assigning one literal
+    visits all of its pairs.
+
+    The binary clauses of a ruleset form a graph with an edge between a and b
+    for every clause -a -b. A group of literals that are all connected to each
+    other (a clique) is an at-most-one constraint. The cliques are found
+    greedily, starting from the literals with the most edges, and each one of
+    at least MIN_GROUP_SIZE literals replaces the clauses of its edges by one
+    native constraint (see WatchedFormula.add_at_most in watched.py). Cliques
+    may overlap, as the row and the box of a sudoku do, but every one covers
+    at least one edge that no earlier one covered.
+'''
+
+from collections import defaultdict
+
+from watched import WatchedFormula
+
+# smaller groups do not save enough clauses to be worth a constraint
+MIN_GROUP_SIZE = 3
+
+
+def find_at_most_one(ruleset, min_size=MIN_GROUP_SIZE):
+
+    '''Find groups of literals of which every pair occurs as a binary clause
+    of their negations. Returns the clauses that are not covered by a group,
+    and the groups as tuples of literals.'''
+
+    ruleset = [tuple(clause) for clause in ruleset]
+
+    # the graph of the binary clauses: a and b are neighbours for -a -b
+    neighbours = defaultdict(set)
+
+    for clause in ruleset:
+        if is_edge(clause):
+            a, b = -clause[0], -clause[1]
+            neighbours[a].add(b)
+            neighbours[b].add(a)
+
+    # the edges that are not yet in a group, nor left as a clause
+    uncovered = dict((literal, set(others)) for literal, others in neighbours.items())
+
+    groups = []
+    covered = set()
+
+    # the literals with the most edges first, then by variable
+    for literal in sorted(neighbours, key=lambda literal: (-len(neighbours[literal]), abs(literal), literal)):
+
+        # a literal may be in several groups, such as a row and a box, so it
+        # is tried again until all its edges are covered
+        while uncovered[literal]:
+
+            group = grow_group(literal, neighbours, uncovered[literal])
+            edges = [(member, other) for position, member in enumerate(group) for other in group[position + 1:]]
+
+            if len(group) >= min_size:
+                groups.append(tuple(group))
+                covered.update(frozenset(edge) for edge in edges)
+
+            # a smaller group stays a clause
+            for member, other in edges:
+                uncovered[member].discard(other)
+                uncovered[other].discard(member)
+
+    remaining = [clause for clause in ruleset
+                 if not (is_edge(clause) and frozenset((-clause[0], -clause[1])) in covered)]
+
+    return remaining, groups
+
+
+def is_edge(clause):
+
+    '''Whether a clause is a pair -a -b of two different variables.'''
+
+    return len(clause) == 2 and abs(clause[0]) != abs(clause[1])
+
+
+def grow_group(literal, neighbours, uncovered):
+
+    '''A clique around a literal: its neighbours are added greedily, as long
+    as they are connected to every literal in the group so far. Those whose
+    edge with the literal is not yet covered come first, then those with the
+    most edges. Groups may share edges, as a row and a box do.'''
+
+    group = [literal]
+    candidates = set(neighbours[literal])
+
+    order = sorted(candidates, key=lambda other: (other not in uncovered, -len(neighbours[other]), abs(other), other))
+
+    for other in order:
+
+        if other in candidates:
+            group.append(other)
+            candidates &= neighbours[other]
+
+    return group
+
+
+def collapsed_formula(ruleset):
+
+    '''A WatchedFormula of a ruleset, with the at-most-one groups found in it
+    as native constraints instead of their binary clauses.'''
+
+    remaining, groups = find_at_most_one(ruleset)
+    formula = WatchedFormula(remaining)
+
+    for group in groups:
+        formula.add_at_most(group, 1)
+
+    return formula
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+'''
+    Conflict-driven clause learning, as an alternative to the DPLL search in
+    dpll.py.
+
+    On a conflict, the implication graph is analysed back to the first unique
+    implication point (1-UIP). The resulting clause is learned, and the search
+    jumps back to the second highest decision level in it instead of simply
+    flipping the last decision. Decisions are made by VSIDS, see vsids.py.
+'''
+
+from collections import Counter
+
+from budget import UNKNOWN
+from dpll import undo_decisions
+from instrument import profile_of, timed
+from restarts import restart_policy
+from vsids import VSIDS, initial_scores
+
+
+def CDCL_algorithm(formula, metrics=None, assumptions=(), restarts=None, vsids=None, budget=None,
+                   proof=None):
+
+    '''The CDCL algorithm. Returns the assigned literals, or an empty list if the
+    ruleset is unsatisfiable. If a metrics Counter is given, the decisions,
+    conflicts and learned clauses are counted in it. If it is a Profile (see
+    instrument.py), the phases of the search are timed as well.
+
+    The assumptions are decided first, each on a level of its own, so that the
+    learned clauses do not depend on them and stay valid when the formula is
+    solved again under other assumptions.
+
+    With a restart policy (see restarts.py), all decisions are regularly undone
+    while the learned clauses are kept, and variables are decided again with
+    the value they had last (phase saving).
+
+    The VSIDS activities of an earlier call on the same formula may be passed
+    in, to start from what that call learned instead of the static scores.
+
+    With a Budget (see budget.py), the search stops when it runs out of time,
+    decisions, conflicts or memory, and returns UNKNOWN (None).
+
+    With a Proof (see proof.py), every learned clause is logged, and the
+    empty clause once the formula is found unsatisfiable.'''
+
+    if metrics is None:
+        metrics = Counter()
+
+    formula.decision_level = 0
+
+    if budget is not None:
+        budget.start()
+
+    # the trail position at which every decision level starts
+    level_starts = []
+
+    # the variables are ordered by their static scores until conflicts are seen;
+    # assumed variables that occur in no clause are unassigned like any other
+    variables = set(abs(literal) for literal in formula.clauses.literals)
+    variables.update(abs(literal) for literal in assumptions)
+    variables.update(abs(literal) for literal in formula.constraint_occurrences)
+
+    if vsids is None:
+        activity, polarity = initial_scores(formula.clauses)
+        vsids = VSIDS(variables, activity, polarity)
+    else:
+        for var in variables:
+            vsids.add_variable(var)
+
+    # the restart schedule, and the last value of every variable once it has one
+    policy = restart_policy(restarts)
+    phases = {} if policy is not None else None
+
+    # with a Profile, every phase of the search is timed
+    profile = profile_of(metrics)
+    propagate = timed(profile, 'unit_propagation', formula.propagate)
+    next_literal = timed(profile, 'heuristic_selection', vsids.next_literal)
+    analyze = timed(profile, 'conflict_analysis', analyze_conflict)
+    undo = timed(profile, 'backtracking', undo_decisions)
+
+    # the unit clauses of the input are assigned at level 0
+    if formula.has_empty_clause:
+        return refuted(proof)
+
+    for unit in formula.units:
+
+        if -unit in formula.true_literals:
+            return refuted(proof)
+
+        if unit not in formula.true_literals:
+            formula.assign(unit)
+
+    while True:
+
+        conflict = propagate()
+
+        if conflict is not None:
+
+            metrics['conflicts'] += 1
+
+            # a conflict without any decisions cannot be resolved
+            if not level_starts:
+                return refuted(proof)
+
+            if budget is not None and budget.conflict():
+                return UNKNOWN
+
+            learned, backjump_level = analyze(formula, conflict, vsids)
+            vsids.decay_activities()
+
+            lbd = len(set(formula.levels[abs(literal)] for literal in learned))
+
+            # undo everything above the backjump level, and make its variables
+            # available for decisions again
+            undo(formula, level_starts[backjump_level], vsids, phases)
+            del level_starts[backjump_level:]
+            formula.decision_level = backjump_level
+
+            # the learned clause is now unit, so its first literal is implied
+            index = formula.add_clause(learned, learned=True)
+            metrics['learned_clauses'] += 1
+
+            if proof is not None:
+                proof.add(learned)
+
+            if len(learned) == 1:
+                formula.assign(learned[0])
+            else:
+                formula.assign(learned[0], index)
+
+            # the learned clause is kept, but the decisions may start over
+            if policy is not None and policy.conflict(lbd) and level_starts:
+
+                metrics['restarts'] += 1
+
+                undo(formula, level_starts[0], vsids, phases)
+                del level_starts[:]
+                formula.decision_level = 0
+
+            continue
+
+        # the assumptions come before any other decision
+        if len(level_starts) < len(assumptions):
+
+            new_literal = assumptions[len(level_starts)]
+
+            if -new_literal in formula.true_literals:
+                return []
+
+            level_starts.append(len(formula.trail))
+            formula.decision_level = len(level_starts)
+
+            if new_literal not in formula.true_literals:
+                formula.assign(new_literal)
+
+            continue
+
+        new_literal = next_literal(formula.true_literals)
+
+        # if every variable has a value, we have found a solution
+        if new_literal is None:
+            return list(formula.trail)
+
+        metrics['decisions'] += 1
+
+        if budget is not None and budget.decision():
+            return UNKNOWN
+
+        if phases is not None and abs(new_literal) in phases:
+            metrics['saved_phases'] += 1
+            new_literal = phases[abs(new_literal)]
+
+        level_starts.append(len(formula.trail))
+        formula.decision_level = len(level_starts)
+        formula.assign(new_literal)
+
+
+def refuted(proof):
+
+    '''The answer for an unsatisfiable formula, which ends its proof, if any.'''
+
+    if proof is not None:
+        proof.add(())
+
+    return []
+
+
+def analyze_conflict(formula, conflict, vsids=None):
+
+    '''Derive the 1-UIP clause from a conflicting clause. Returns the learned
+    clause, with the asserting literal first and a literal of the backjump
+    level second, together with the level to jump back to. The activity of
+    every variable involved is bumped in vsids, if given.'''
+
+    clauses = formula.clauses
+    trail = formula.trail
+    levels = formula.levels
+    reasons = formula.reasons
+    current_level = formula.decision_level
+
+    seen = set()
+    learned = []
+
+    # the number of literals of the current level that still have to be resolved
+    open_literals = 0
+
+    clause = formula.explain(conflict)
+    literal = None
+    position = len(trail) - 1
+
+    while True:
+
+        for other in clause:
+
+            variable = abs(other)
+
+            # skip the implied literal itself, and what was already seen
+            if other == literal or variable in seen:
+                continue
+
+            # literals of level 0 are false in every model, so they can be left out
+            if levels[variable] == 0:
+                continue
+
+            seen.add(variable)
+
+            if vsids is not None:
+                vsids.bump(variable)
+
+            if levels[variable] == current_level:
+                open_literals += 1
+            else:
+                learned.append(other)
+
+        # walk back on the trail to the last literal involved in the conflict
+        while abs(trail[position]) not in seen:
+            position -= 1
+
+        literal = trail[position]
+        position -= 1
+        open_literals -= 1
+
+        # the only literal of the current level left is the first UIP
+        if open_literals == 0:
+            break
+
+        clause = formula.explain(reasons[abs(literal)])
+
+    if not learned:
+        return [-literal], 0
+
+    # the literal of the highest remaining level is watched next to the UIP
+    highest = max(range(len(learned)), key=lambda k: levels[abs(learned[k])])
+    learned[0], learned[highest] = learned[highest], learned[0]
+
+    return [-literal] + learned, levels[abs(learned[0])]
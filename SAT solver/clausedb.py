@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+'''
+    A compact clause database. All literals are kept in one flat array of
+    32-bit integers, and clauses are addressed by their index: the position of
+    their first literal and their size are looked up in parallel arrays. This
+    takes a few bytes per literal, where a Python set of ints takes hundreds of
+    bytes per clause.
+'''
+
+from array import array
+
+
+class ClauseDatabase(object):
+
+    '''Clauses stored as slices of one flat literal array, with per-clause
+    metadata: size, and whether the clause was learned.'''
+
+    def __init__(self, clauses=()):
+
+        # all literals, clause after clause
+        self.literals = array('i')
+
+        # per clause: the position of its first literal and its size
+        self.starts = array('i')
+        self.sizes = array('i')
+
+        # per clause: 1 if it was learned during search
+        self.learned = array('b')
+
+        for clause in clauses:
+            self.add(clause)
+
+    def __len__(self):
+
+        return len(self.sizes)
+
+    def add(self, clause, learned=False):
+
+        '''Append a clause and return its index.'''
+
+        index = len(self.sizes)
+
+        self.starts.append(len(self.literals))
+        self.literals.extend(clause)
+        self.sizes.append(len(self.literals) - self.starts[index])
+        self.learned.append(1 if learned else 0)
+
+        return index
+
+    def clause(self, index):
+
+        '''The literals of a clause, as a slice of the literal array.'''
+
+        start = self.starts[index]
+
+        return self.literals[start:start + self.sizes[index]]
+
+    def __getitem__(self, index):
+
+        return self.clause(index)
+
+    def __iter__(self):
+
+        for index in range(len(self.sizes)):
+            yield self.clause(index)
+
+    def nbytes(self):
+
+        '''The number of bytes taken by the arrays.'''
+
+        arrays = [self.literals, self.starts, self.sizes, self.learned]
+
+        return sum(len(values) * values.itemsize for values in arrays)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+'''
+    Streaming reader for DIMACS CNF files.
+
+    The file is read through a memory map (or in large chunks for gzip, xz and
+    bz2 compressed files), and every chunk is turned into integers in one go.
+    Clauses are split on their terminating 0, so they may span several lines
+    or share one, and the last line does not need a newline. The 'p cnf'
+    header is checked, and no literal may exceed its number of variables; its
+    number of clauses is not enforced, since sudoku-rules.txt itself declares
+    more than it has. Comment lines and the '%' end marker of SATLIB files are
+    skipped.
+'''
+
+import bz2
+import gzip
+import lzma
+import mmap
+import re
+from array import array
+
+from clausedb import ClauseDatabase
+
+# the amount of input that is tokenized at once
+CHUNK_SIZE = 1 << 24
+
+# lines that do not hold clause literals: comments, the header and the end marker
+NON_CLAUSE_LINE = re.compile(rb'^[ \t]*[a-zA-Z%].*$', re.MULTILINE)
+
+OPENERS = {
+    '.gz': gzip.open,
+    '.xz': lzma.open,
+    '.lzma': lzma.open,
+    '.bz2': bz2.open,
+}
+
+
+def parse_DIMACS(filename):
+
+    '''Read a DIMACS CNF file into a ClauseDatabase. Returns the database and
+    the number of variables, taken from the header if there is one. Duplicate
+    literals within a clause are removed.'''
+
+    parser = DIMACSParser()
+
+    for chunk in read_chunks(filename):
+        parser.feed(chunk)
+
+    return parser.finish()
+
+
+def read_chunks(filename):
+
+    '''Yield the contents of a (possibly compressed) file in large chunks.'''
+
+    for extension, opener in OPENERS.items():
+        if filename.endswith(extension):
+
+            with opener(filename, 'rb') as file:
+                while True:
+                    chunk = file.read(CHUNK_SIZE)
+
+                    if not chunk:
+                        return
+
+                    yield chunk
+
+    with open(filename, 'rb') as file:
+
+        # an empty file cannot be memory mapped
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return
+
+        try:
+            for start in range(0, len(data), CHUNK_SIZE):
+                yield data[start:start + CHUNK_SIZE]
+        finally:
+            data.close()
+
+
+class DIMACSParser(object):
+
+    '''Incremental DIMACS parser: feed() it chunks of bytes in order, and
+    finish() it to get the clauses.'''
+
+    def __init__(self):
+
+        self.clauses = ClauseDatabase()
+        self.variables = None
+
+        # an incomplete line at the end of the previous chunk
+        self.remainder = b''
+
+        # the literals of a clause that is not terminated yet
+        self.pending = array('i')
+
+        # after a '%' line, the rest of the file is ignored
+        self.ended = False
+
+    def feed(self, chunk):
+
+        if self.ended:
+            return
+
+        data = self.remainder + chunk
+
+        # only complete lines are parsed, the rest waits for the next chunk
+        end = data.rfind(b'\n') + 1
+        self.remainder = data[end:]
+        self.parse_lines(data[:end])
+
+    def parse_lines(self, data):
+
+        # most chunks are pure numbers; only look at lines when there are letters
+        if NON_CLAUSE_LINE.search(data):
+
+            for match in NON_CLAUSE_LINE.finditer(data):
+                line = match.group().strip()
+
+                if line.startswith(b'p'):
+                    self.parse_header(line)
+
+                elif line.startswith(b'%'):
+                    self.ended = True
+                    data = data[:match.start()]
+                    break
+
+            data = NON_CLAUSE_LINE.sub(b'', data)
+
+        try:
+            values = array('i', map(int, data.split()))
+        except ValueError as error:
+            raise ValueError('invalid literal in DIMACS input: %s' % error)
+
+        self.add_literals(values)
+
+    def parse_header(self, line):
+
+        fields = line.split()
+
+        if len(fields) != 4 or fields[1] != b'cnf':
+            raise ValueError('invalid DIMACS header: %r' % line.decode(errors='replace'))
+
+        if self.variables is not None:
+            raise ValueError('more than one DIMACS header')
+
+        try:
+            self.variables = int(fields[2])
+            clauses = int(fields[3])
+        except ValueError:
+            raise ValueError('invalid DIMACS header: %r' % line.decode(errors='replace'))
+
+        if self.variables < 0 or clauses < 0:
+            raise ValueError('invalid DIMACS header: %r' % line.decode(errors='replace'))
+
+    def add_literals(self, values):
+
+        '''Split a run of literals into clauses on their terminating zeros.'''
+
+        clauses = self.clauses
+        position = 0
+
+        while True:
+
+            try:
+                end = values.index(0, position)
+            except ValueError:
+                self.pending.extend(values[position:])
+                return
+
+            clause = values[position:end]
+            position = end + 1
+
+            if self.pending:
+                clause = self.pending + clause
+                self.pending = array('i')
+
+            # remove duplicate literals, keeping the first occurrence
+            if len(set(clause)) != len(clause):
+                clause = array('i', dict.fromkeys(clause))
+
+            clauses.add(clause)
+
+    def finish(self):
+
+        '''Parse what is left, check the result against the header, and return
+        the clauses with the number of variables.'''
+
+        if self.remainder and not self.ended:
+            self.parse_lines(self.remainder + b'\n')
+
+        self.remainder = b''
+
+        # a last clause without its terminating zero is still accepted
+        if self.pending:
+            self.clauses.add(array('i', dict.fromkeys(self.pending)))
+            self.pending = array('i')
+
+        literals = self.clauses.literals
+        largest = max(max(literals), -min(literals)) if literals else 0
+
+        if self.variables is None:
+            return self.clauses, largest
+
+        if largest > self.variables:
+            raise ValueError('variable %d exceeds the %d declared in the DIMACS header'
+                             % (largest, self.variables))
+
+        return self.clauses, self.variables
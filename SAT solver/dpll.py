@@ -0,0 +1,389 @@
+#!/usr/bin/env python
+'''
+    The DPLL search shared by SAT.py and scripts/SAT_for_analysis.py.
+
+    The search is iterative: every decision is put on a stack together with the
+    trail position it was made at, and backtracking undoes the assignments on
+    the formula in place. Memory therefore does not grow with the search depth,
+    and deep searches do not run into Python's recursion limit. The heuristic
+    scores follow the assignment incrementally, see scores.py.
+'''
+
+from budget import UNKNOWN
+from dimacs import parse_DIMACS
+from instrument import profile_of, timed
+from matrix import MatrixScores
+from restarts import restart_policy
+from scores import HeuristicScores
+from vsids import VSIDS, initial_scores
+
+
+def DP_algorithm(formula, heuristic, metrics=None, assumptions=(), scores=None, restarts=None,
+                 backend=None, budget=None, proof=None):
+
+    '''The DPLL algorithm. It consists of a simplifcation stage and a stage in which
+    literals are assigned according to a heuristic. If a conflict is found, the
+    most recent decision whose negation has not been tried yet is flipped.
+    Returns the assigned literals, or an empty list if the ruleset is
+    unsatisfiable. If a metrics Counter is given, the tried assignments,
+    backtracks and conflicts are counted in it. If it is a Profile (see
+    instrument.py), the phases of the search are timed as well.
+
+    The assumptions are assigned before the search starts, as if they were
+    unit clauses. The scores of an earlier call on the same formula may be
+    passed in to save building them again, provided the formula has been
+    undone to an empty assignment since.
+
+    With a restart policy (see restarts.py), the search regularly undoes all
+    of its decisions and starts over, and a variable that is decided on again
+    gets the value it had last (phase saving). The restarts and the decisions
+    that took a saved phase are counted in the metrics too.
+
+    The backend 'numpy' computes the scores in bulk with NumPy (see matrix.py)
+    instead of updating them incrementally.
+
+    With a Budget (see budget.py), the search stops when it runs out of time,
+    decisions, conflicts or memory, and returns UNKNOWN (None).
+
+    With a Proof (see proof.py), the negation of the decisions is logged on
+    every conflict, apart from decisions that were flipped: those follow from
+    the clause logged when they were flipped, and that clause is deleted once
+    the search backtracks past it. The last clause logged, when no decision is
+    left to flip, is the empty clause (or the negated assumptions).'''
+
+    # the scores of the heuristic follow every change to the assignment
+    if scores is None:
+        scores = heuristic_scores(formula.clauses, heuristic, backend)
+
+    formula.listener = scores
+
+    if budget is not None:
+        budget.start()
+
+    for literal in assumptions:
+
+        if -literal in formula.true_literals:
+            return []
+
+        if literal not in formula.true_literals:
+            formula.assign(literal)
+
+    # VSIDS instead picks the most active variable, bumped on every conflict
+    vsids = None
+
+    if heuristic == "VSIDS":
+        variables = set(abs(literal) for literal in formula.clauses.literals)
+        variables.update(abs(literal) for literal in formula.constraint_occurrences)
+        activity, polarity = initial_scores(formula.clauses)
+        vsids = VSIDS(variables, activity, polarity)
+
+    # the restart schedule, and the last value of every variable once it has one
+    policy = restart_policy(restarts)
+    phases = {} if policy is not None else None
+
+    # with a Profile, every phase of the search is timed; otherwise the
+    # functions are used as they are
+    profile = profile_of(metrics)
+    pure_literals = timed(profile, 'pure_literals', check_pure_literals)
+    unit_clauses = timed(profile, 'unit_propagation', check_unit_clauses)
+    select_literal = timed(profile, 'heuristic_selection', assign_new_literal)
+    undo = timed(profile, 'backtracking', undo_decisions)
+
+    if vsids is not None:
+        next_literal = timed(profile, 'heuristic_selection', vsids.next_literal)
+
+    # the decision stack: trail position, decided literal and whether it was flipped
+    decisions = []
+    formula.decision_level = 0
+
+    while True:
+
+        # first run the simplifcation rules
+        pure_assigned = pure_literals(formula, scores)
+        unit_assigned = unit_clauses(formula)
+
+        # if we have not received a -1, we have not failed (yet)
+        if unit_assigned != -1:
+
+            # if no clause is left unsatisfied, we have found a solution, once
+            # the unassigned literals of the constraints are made false; if
+            # some variable occurs in them in both polarities, it is decided on
+            undecided = None
+
+            if scores.open_clauses == 0:
+                completion, undecided = formula.complete_constraints()
+
+                if undecided is None:
+                    return list(formula.trail) + completion
+
+            # we have not yet found a solution, so we assign a new literal
+            # by the determined method and continue with it
+            if metrics is not None:
+                metrics['tried_assignments'] += 1
+                metrics['decisions'] += 1
+
+            if budget is not None and budget.decision():
+                return UNKNOWN
+
+            if undecided is not None:
+                new_literal = undecided
+            elif vsids is not None:
+                new_literal = next_literal(formula.true_literals)
+            else:
+                new_literal = select_literal(scores, heuristic)
+
+            # the heuristic picks the variable, a saved phase its value
+            if phases is not None and abs(new_literal) in phases:
+
+                if metrics is not None:
+                    metrics['saved_phases'] += 1
+
+                new_literal = phases[abs(new_literal)]
+
+            decisions.append((len(formula.trail), new_literal, False))
+            formula.decision_level = len(decisions)
+            formula.assign(new_literal)
+            continue
+
+        if metrics is not None:
+            metrics['conflicts'] += 1
+
+        # pure literals never take part in a conflict, since every clause with
+        # their negation was satisfied when they were assigned, so the
+        # decisions alone lead to it by unit propagation
+        if proof is not None:
+            proof.add(negated_decisions(assumptions, decisions))
+
+        # a conflict without decisions is a definite answer, given below
+        if budget is not None and decisions and budget.conflict():
+            return UNKNOWN
+
+        # the variables of the conflicting clause become more active
+        if vsids is not None and formula.conflict is not None:
+
+            for literal in formula.explain(formula.conflict):
+                vsids.bump(abs(literal))
+
+            vsids.decay_activities()
+
+        # instead of backtracking, the restart schedule may start over
+        if policy is not None and policy.conflict(conflict_lbd(formula, len(decisions))) and decisions:
+
+            if metrics is not None:
+                metrics['restarts'] += 1
+
+            undo(formula, decisions[0][0], vsids, phases)
+            decisions = []
+            formula.decision_level = 0
+            continue
+
+        # we have failed, so we undo decisions until we find one whose negation
+        # has not been tried yet
+        while decisions:
+
+            position, literal, flipped = decisions.pop()
+
+            undo(formula, position, vsids, phases)
+
+            # the clause that flipped this decision is implied by the next one
+            if flipped and proof is not None:
+                proof.delete(negated_decisions(assumptions, decisions) + [literal])
+
+            if not flipped:
+
+                if metrics is not None:
+                    metrics['backtracks'] += 1
+
+                decisions.append((position, -literal, True))
+                formula.decision_level = len(decisions)
+                formula.assign(-literal)
+                break
+
+        # no decisions left to flip, so the ruleset is unsatisfiable
+        else:
+            return []
+
+
+def negated_decisions(assumptions, decisions):
+
+    '''The clause that the decisions on the stack that were not flipped, under
+    the assumptions, cannot all be true.'''
+
+    return [-literal for literal in assumptions] + [-literal for position, literal, flipped in decisions
+                                                    if not flipped]
+
+
+def heuristic_scores(clauses, heuristic, backend=None):
+
+    '''The scores of a heuristic over a clause database, kept up to date by
+    default, or recomputed with NumPy with the backend 'numpy'.'''
+
+    if backend == "numpy":
+        return MatrixScores(clauses, heuristic)
+
+    if backend is not None:
+        raise ValueError('unknown scores backend %r' % backend)
+
+    return HeuristicScores(clauses, heuristic)
+
+
+def undo_decisions(formula, position, vsids=None, phases=None):
+
+    '''Undo the assignments from a trail position on. Their variables are made
+    available to VSIDS again, and their values saved as phases, if given.'''
+
+    undone = formula.trail[position:]
+
+    if vsids is not None:
+        for literal in undone:
+            vsids.insert(abs(literal))
+
+    if phases is not None:
+        for literal in undone:
+            phases[abs(literal)] = literal
+
+    formula.undo(position)
+
+
+def conflict_lbd(formula, decision_level):
+
+    '''The number of decision levels among the literals of the conflicting
+    clause (its literal block distance).'''
+
+    if formula.conflict is None:
+        return decision_level
+
+    levels = formula.levels
+
+    return len(set(levels[abs(literal)] for literal in formula.explain(formula.conflict)))
+
+
+def assign_new_literal(scores, heuristic):
+
+    '''Select a new literal to be assigned by the named heuristic.'''
+
+    if heuristic == "JW":
+        return assign_new_literal_JW(scores)
+
+    elif heuristic == "JWTS":
+        return assign_new_literal_JWTS(scores)
+
+    elif heuristic == "nishio":
+        return assign_new_literal_nishio(scores)
+
+    elif heuristic == "MOMS" or heuristic == "MOM":
+        return assign_new_literal_MOMs(scores)
+
+    else:
+        return assign_new_literal_random(scores)
+
+
+def check_pure_literals(formula, scores):
+
+    '''Check for pure literals in the clauses that are not yet satisfied,
+    assign them on the formula and return them as a list.'''
+
+    # a literal is pure if its negative does not occur; the scores keep track
+    # of these, so take a copy before assigning them. The scores only count
+    # clauses, so a literal that occurs in a constraint is not pure.
+    pure_literals = [literal for literal in scores.pure if not formula.constrains(literal)]
+
+    # all clauses containing pure literals are now satisfied
+    for literal in pure_literals:
+        formula.assign(literal)
+
+    return pure_literals
+
+
+def check_unit_clauses(formula):
+
+    '''Assign the unit clauses and everything they imply through the watched
+    literals. Returns the assigned literals as a list, or -1 on a conflict.'''
+
+    position = len(formula.trail)
+    formula.conflict = None
+
+    if formula.has_empty_clause:
+        return -1
+
+    # the unit clauses of the input have no watches, so assign them directly
+    for unit in formula.units:
+
+        if -unit in formula.true_literals:
+            return -1
+
+        if unit not in formula.true_literals:
+            formula.assign(unit)
+
+    # if propagation finds a clause with only false literals, we have failed
+    if formula.propagate() is not None:
+        return -1
+
+    return formula.trail[position:]
+
+
+def check_tautologies(ruleset):
+
+    '''Check for tautologies. If any, the clause may be removed.'''
+
+    ruleset = [clause for clause in ruleset if not has_tautology(clause)]
+
+    return ruleset
+
+
+def has_tautology(clause):
+
+    '''Checks if a clause has a tautology: a literal and its negated form both occur.'''
+
+    return any(-literal in clause for literal in clause)
+
+
+def assign_new_literal_random(scores):
+
+    '''Randomly select a new literal to be assigned, each literal occurrence in
+    the unsatisfied clauses being equally likely.'''
+
+    return scores.random_literal()
+
+
+def assign_new_literal_MOMs(scores):
+
+    '''Select a new literal to be assigned based on the MOMs heuristic: the
+    literal with the highest occurrence count in the shortest clauses.'''
+
+    return scores.best_MOMs()
+
+
+def assign_new_literal_JW(scores):
+
+    '''Select a new literal to be assigned based on the Jeroslow-Wang 1-sided
+    heuristic: the literal with the highest sum of 2 ** -len(clause).'''
+
+    return scores.best_JW()
+
+
+def assign_new_literal_JWTS(scores):
+
+    '''Select a new literal to be assigned based on the Jeroslow-Wang 2-sided
+    heuristic: the variable with the highest summed-up value over both
+    polarities, in the polarity that has the heighest weight.'''
+
+    return scores.best_JWTS()
+
+
+def assign_new_literal_nishio(scores):
+
+    '''Returns the literal for which there are the fewest options left.
+    This is equivalent to the positive literal that has the fewest negative
+    constraints.'''
+
+    return scores.best_nishio()
+
+
+def read_DIMACS(filename):
+
+    '''Read in the DIMACS file format to a ClauseDatabase, see dimacs.py.'''
+
+    ruleset, variables = parse_DIMACS(filename)
+
+    return ruleset
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+'''
+    The encoding of N x N sudokus as propositional variables, for any N that
+    is a square: 4, 9, 16 (hexadoku), 25 and so on.
+
+    The variable for "row r, column c holds value v", with r, c and v from 1
+    to N, is (r * (N + 1) + c) * (N + 1) + v. For N = 9 this is the number rcv
+    in decimal, as in sudoku-rules.txt, so the 9 x 9 files and solutions stay
+    as they were. For larger grids, writing the digits of r, c and v after
+    each other would make two cells share a variable (1, 11, 1 and 11, 1, 1
+    are both 1111); this mapping keeps every variable unique.
+
+    A puzzle is written as one line of N * N characters, row by row. The
+    symbols of the values 1 to N are the first N of SYMBOLS: the digits 1 to 9,
+    then letters, so a hexadoku uses 1-9 and A-G. Any other character, such as
+    '.' or '0', is a blank.
+'''
+
+import math
+
+SYMBOLS = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def grid_size(puzzle):
+
+    '''The N of a puzzle of N * N characters. Raises a ValueError if there is
+    no such N, or if it is not a square.'''
+
+    size = math.isqrt(len(puzzle))
+    box = math.isqrt(size)
+
+    if size * size != len(puzzle) or box * box != size or not 1 < size <= len(SYMBOLS):
+        raise ValueError('a sudoku must have N * N characters for a square N such as 9 or 16, '
+                         'not %d: %r' % (len(puzzle), puzzle))
+
+    return size
+
+
+def variable(row, column, value, size=9):
+
+    '''The variable of a value in a cell, all counted from 1.'''
+
+    return (row * (size + 1) + column) * (size + 1) + value
+
+
+def decode(var, size=9):
+
+    '''The row, column and value of a variable.'''
+
+    cell, value = divmod(var, size + 1)
+    row, column = divmod(cell, size + 1)
+
+    return row, column, value
+
+
+def puzzle_givens(puzzle, size=9):
+
+    '''The givens of a puzzle as literals.'''
+
+    givens = []
+
+    for position, symbol in enumerate(puzzle[:size * size]):
+
+        value = SYMBOLS.find(symbol, 0, size) + 1
+
+        if value:
+            row, column = divmod(position, size)
+            givens.append(variable(row + 1, column + 1, value, size))
+
+    return givens
+
+
+def solution_string(solution, size=9):
+
+    '''The grid of a solution as a string, row by row; cells without a true
+    literal stay '.'.'''
+
+    grid = ['.'] * (size * size)
+
+    for literal in solution:
+        if literal > 0:
+            row, column, value = decode(literal, size)
+
+            if 1 <= row <= size and 1 <= column <= size and 1 <= value <= size:
+                grid[(row - 1) * size + column - 1] = SYMBOLS[value - 1]
+
+    return ''.join(grid)
+
+
+def units(size=9):
+
+    '''The rows, columns and boxes, each as a list of its (row, column) cells.'''
+
+    box = math.isqrt(size)
+    rows = [[(row, column) for column in range(1, size + 1)] for row in range(1, size + 1)]
+    columns = [[(row, column) for row in range(1, size + 1)] for column in range(1, size + 1)]
+    boxes = [[(top + row, left + column) for row in range(1, box + 1) for column in range(1, box + 1)]
+             for top in range(0, size, box) for left in range(0, size, box)]
+
+    return rows + columns + boxes
+
+
+def groups(size=9):
+
+    '''The groups of variables of which exactly one is true: the values of
+    every cell, and the cells of every row, column and box for every value.'''
+
+    cells = [[variable(row, column, value, size) for value in range(1, size + 1)]
+             for row in range(1, size + 1) for column in range(1, size + 1)]
+
+    placements = [[variable(row, column, value, size) for row, column in unit]
+                  for unit in units(size) for value in range(1, size + 1)]
+
+    return cells + placements
+
+
+def sudoku_rules(size=9):
+
+    '''The rules of an N x N sudoku as clauses: for every group, one clause
+    that one of its variables is true, and one per pair that not both are.
+    For N = 25, that is over 750000 clauses; see bitmask.py for a backend
+    that does without the pairs.'''
+
+    for group in groups(size):
+
+        yield group
+
+        for position, first in enumerate(group):
+            for second in group[position + 1:]:
+                yield [-first, -second]
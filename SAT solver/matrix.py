@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+'''
+    Heuristic scores computed in bulk with NumPy, as an alternative to the
+    incrementally maintained scores in scores.py.
+
+    The clauses are stored as a sparse clause x literal matrix in coordinate
+    (COO) form: for every literal occurrence, its column (the literal shifted
+    to be non-negative) and its clause. Sums per clause and per column are
+    both taken with bincount. The assignment is a single array of values
+    per variable, so assigning and unassigning cost next to nothing. Before a
+    decision, the clauses that are not yet satisfied are found as a mask, and
+    every heuristic is a weighted column sum over the unassigned literals of
+    those clauses.
+
+    NumPy is optional: without it, this module can be imported, but building a
+    ClauseMatrix raises an ImportError.
+'''
+
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class ClauseMatrix(object):
+
+    '''The literal occurrences of a ClauseDatabase in COO form. Columns are
+    numbered literal + variables, so that -variables .. variables become
+    0 .. 2 * variables.'''
+
+    def __init__(self, clauses):
+
+        if np is None:
+            raise ImportError('the matrix backend needs NumPy')
+
+        literals = np.asarray(clauses.literals, dtype=np.int64)
+        sizes = np.asarray(clauses.sizes, dtype=np.int64)
+
+        self.variables = int(np.abs(literals).max()) if len(literals) else 0
+        self.clause_count = len(sizes)
+
+        # the clause of every entry and its column
+        self.rows = np.repeat(np.arange(len(sizes)), sizes)
+        self.columns = literals + self.variables
+
+        # the variable and sign of every entry, to look up its value
+        self.entry_variables = np.abs(literals)
+        self.entry_signs = np.sign(literals).astype(np.int8)
+
+    def column_sums(self, mask, weights=None):
+
+        '''The sum of the weights of the selected entries, per column.'''
+
+        return np.bincount(self.columns[mask], weights, minlength=2 * self.variables + 1)
+
+    def literal(self, column):
+
+        return int(column) - self.variables
+
+
+def jw_scores(clauses):
+
+    '''The static Jeroslow-Wang weight of every literal, sum(2 ** -len(clause)),
+    as a dict. The weight of a clause is computed once, not once per literal.'''
+
+    matrix = ClauseMatrix(clauses)
+    weights = np.ldexp(1.0, -np.asarray(clauses.sizes, dtype=np.int64))[matrix.rows]
+    occurs = np.bincount(matrix.columns, minlength=2 * matrix.variables + 1) > 0
+    sums = matrix.column_sums(slice(None), weights)
+
+    columns = np.nonzero(occurs)[0]
+
+    return dict(zip((columns - matrix.variables).tolist(), sums[columns].tolist()))
+
+
+class MatrixScores(object):
+
+    '''Literal scores over the unsatisfied part of a ruleset, recomputed with
+    NumPy when they are needed after the assignment has changed. Offers the
+    same interface to the search as HeuristicScores.'''
+
+    def __init__(self, ruleset, heuristic):
+
+        self.matrix = ClauseMatrix(ruleset)
+        self.heuristic = heuristic
+
+        # per variable: 1 if true, -1 if false and 0 if unassigned
+        self.values = np.zeros(self.matrix.variables + 1, dtype=np.int8)
+
+        # set when the assignment has changed since the last update
+        self.stale = True
+
+        self.update()
+
+    def assign(self, literal):
+
+        # variables that occur in no clause, such as assumptions, do not count
+        if abs(literal) <= self.matrix.variables:
+            self.values[abs(literal)] = 1 if literal > 0 else -1
+            self.stale = True
+
+    def unassign(self, literal):
+
+        if abs(literal) <= self.matrix.variables:
+            self.values[abs(literal)] = 0
+            self.stale = True
+
+    def update(self):
+
+        '''Find the unsatisfied clauses and their unassigned literals, and count
+        those per column.'''
+
+        matrix = self.matrix
+        entry_values = self.values[matrix.entry_variables] * matrix.entry_signs
+
+        # a clause is satisfied by any true entry
+        satisfied = np.bincount(matrix.rows[entry_values > 0], minlength=matrix.clause_count) > 0
+        open_clauses = ~satisfied
+
+        # the unassigned literals of the open clauses, and their number per clause
+        self.active = (entry_values == 0) & open_clauses[matrix.rows]
+        self.free = np.bincount(matrix.rows[self.active], minlength=matrix.clause_count)
+        self.open_mask = open_clauses
+        self._open_clauses = int(open_clauses.sum())
+
+        self.counts = matrix.column_sums(self.active)
+
+        # a literal is pure if it occurs while its negation does not
+        variables = matrix.variables
+        positive = self.counts[variables + 1:]
+        negative = self.counts[variables - 1::-1] if variables else positive
+
+        pure_positive = np.nonzero((positive > 0) & (negative == 0))[0] + 1
+        pure_negative = np.nonzero((negative > 0) & (positive == 0))[0] + 1
+        self._pure = set(pure_positive.tolist()) | set((-pure_negative).tolist())
+
+        self.stale = False
+
+    @property
+    def open_clauses(self):
+
+        if self.stale:
+            self.update()
+
+        return self._open_clauses
+
+    @property
+    def pure(self):
+
+        if self.stale:
+            self.update()
+
+        return self._pure
+
+    def jw(self):
+
+        '''The Jeroslow-Wang weight of every column, over the open clauses.'''
+
+        matrix = self.matrix
+        weights = np.ldexp(1.0, -self.free[matrix.rows[self.active]])
+
+        return matrix.column_sums(self.active, weights)
+
+    def best_column(self, scores, candidates):
+
+        '''The candidate column with the highest score; ties go to the lowest
+        variable, and then to the positive literal.'''
+
+        scores = np.where(candidates, scores, -np.inf)
+        best = np.nonzero(scores == scores.max())[0]
+        literals = best - self.matrix.variables
+
+        return best[np.lexsort((-literals, np.abs(literals)))[0]]
+
+    def best_JW(self):
+
+        if self.stale:
+            self.update()
+
+        return self.matrix.literal(self.best_column(self.jw(), self.counts > 0))
+
+    def best_JWTS(self):
+
+        if self.stale:
+            self.update()
+
+        variables = self.matrix.variables
+        jw = self.jw()
+        positive = jw[variables + 1:]
+        negative = jw[variables - 1::-1]
+        occurs = (self.counts[variables + 1:] > 0) | (self.counts[variables - 1::-1] > 0)
+
+        scores = np.where(occurs, positive + negative, -np.inf)
+        var = int(np.nonzero(scores == scores.max())[0][0]) + 1
+
+        return var if positive[var - 1] > negative[var - 1] else -var
+
+    def best_MOMs(self):
+
+        if self.stale:
+            self.update()
+
+        matrix = self.matrix
+        sizes = self.free[self.open_mask]
+        minsize = sizes[sizes > 0].min()
+
+        mask = self.active & (self.free[matrix.rows] == minsize)
+        counts = matrix.column_sums(mask)
+
+        return matrix.literal(self.best_column(counts, counts > 0))
+
+    def best_nishio(self):
+
+        '''The positive literal with the fewest negative occurrences left.'''
+
+        if self.stale:
+            self.update()
+
+        variables = self.matrix.variables
+        negative = self.counts[variables - 1::-1]
+
+        # if no negative literal is left, any literal that still occurs will do
+        if not negative.any():
+            return self.matrix.literal(np.argmax(self.counts))
+
+        scores = np.where(negative > 0, negative, np.iinfo(negative.dtype).max)
+
+        return int(np.argmin(scores)) + 1
+
+    def random_literal(self):
+
+        '''A literal drawn uniformly from all literal occurrences.'''
+
+        if self.stale:
+            self.update()
+
+        running = np.cumsum(self.counts)
+        target = random.randrange(int(running[-1]))
+
+        return self.matrix.literal(np.searchsorted(running, target, side='right'))
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+'''
+    A streaming pipeline that solves puzzle files of any size: read, encode,
+    solve and emit, each stage a generator over the one before.
+
+    Usage: python pipeline.py heuristic file [file ...] [--output FILE]
+                              [--workers N] [--chunksize K] [--window W]
+                              [--unordered] [--amo] [--bitmask]
+
+    The files hold one sudoku per line, of any size (see grid.py); '-' reads
+    stdin, and a folder stands for its files, in the order clean_DIMACS.py
+    numbers them. Lines are read one at a time and turned into the literals
+    of their givens, and the solutions are written as they are found to a
+    single output (stdout by default), one line per puzzle, empty if it has
+    no solution. Nothing holds the whole input: at most --window chunks of
+    --chunksize puzzles are on their way at once, so memory stays the same
+    for the 17445 puzzles of subig20 as for ten.
+
+    With --workers, the chunks are solved on a pool of processes that each
+    keep the sudoku rules warm (see rulebase.py) and take the next chunk of
+    the stream as soon as they are done with one. The solutions still come
+    out in the order of the input; with --unordered, every one is written as
+    soon as it is ready instead, after its index and a tab.
+'''
+
+import argparse
+import itertools
+import os
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from bitmask import solve_givens
+from budget import UNKNOWN
+from grid import grid_size, puzzle_givens, solution_string
+from rulebase import shared_rule_base
+
+# puzzles per task handed to a worker, and tasks on their way at once per worker
+CHUNK_SIZE = 16
+WINDOW = 4
+
+
+def read(paths):
+
+    '''Yield the puzzle lines of the files, numbered from 0, one at a time.'''
+
+    index = 0
+
+    for path in paths:
+
+        if path == '-':
+            files = [None]
+        elif os.path.isdir(path):
+            files = [entry.path for entry in os.scandir(path)]
+        else:
+            files = [path]
+
+        for filename in files:
+
+            file = sys.stdin if filename is None else open(filename)
+
+            try:
+                for line in file:
+
+                    if line.strip():
+                        yield index, line.strip()
+                        index += 1
+
+            finally:
+                if file is not sys.stdin:
+                    file.close()
+
+
+def encode(lines):
+
+    '''Yield the size of every puzzle with the literals of its givens. A line
+    that is not a sudoku is reported on stderr, and gets a size of None.'''
+
+    for index, line in lines:
+
+        try:
+            size = grid_size(line)
+        except ValueError as error:
+            print('Line %d: %s' % (index, error), file=sys.stderr)
+            yield index, None, None
+            continue
+
+        yield index, size, puzzle_givens(line, size)
+
+
+def solve_chunk(chunk, heuristic, cardinality=False, bitmask=False):
+
+    '''Solve a chunk of encoded puzzles, with the rule base of this process
+    for the 9 x 9 ones. Returns (index, solution string) pairs, with None
+    for a puzzle without solution and for a line that is not a puzzle.'''
+
+    solved = []
+
+    for index, size, givens in chunk:
+
+        if size is None:
+            solved.append((index, None))
+            continue
+
+        if size == 9 and not bitmask:
+            solution = shared_rule_base(cardinality).solve(givens, heuristic)
+        else:
+            solution = solve_givens(givens, size, heuristic)
+
+        solved.append((index, solution_string(solution, size) if solution is not UNKNOWN and solution else None))
+
+    return solved
+
+
+def chunks(tasks, size):
+
+    '''Yield lists of up to size tasks from a stream.'''
+
+    tasks = iter(tasks)
+
+    while True:
+        chunk = list(itertools.islice(tasks, size))
+
+        if not chunk:
+            return
+
+        yield chunk
+
+
+def solve(encoded, heuristic, workers=1, chunksize=CHUNK_SIZE, window=WINDOW, ordered=True,
+          cardinality=False, bitmask=False):
+
+    '''Yield (index, solution) pairs for a stream of encoded puzzles, in the
+    order of the stream unless ordered is False. With more than one worker,
+    the chunks are solved in a pool, with at most window chunks per worker
+    submitted and not yet yielded.'''
+
+    if workers == 1:
+        for chunk in chunks(encoded, chunksize):
+            yield from solve_chunk(chunk, heuristic, cardinality, bitmask)
+
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=shared_rule_base,
+                             initargs=(cardinality,)) as pool:
+
+        limit = window * (workers or os.cpu_count() or 1)
+        pending = deque()
+
+        for chunk in chunks(encoded, chunksize):
+
+            pending.append(pool.submit(solve_chunk, chunk, heuristic, cardinality, bitmask))
+
+            # the stream is only read further once there is room again
+            while len(pending) >= limit:
+                yield from finished(pending, ordered)
+
+        while pending:
+            yield from finished(pending, ordered)
+
+
+def finished(pending, ordered):
+
+    '''Take finished chunks off the pending futures and yield their results:
+    the oldest chunk, or in any order every chunk that is done.'''
+
+    if ordered:
+        yield from pending.popleft().result()
+        return
+
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+    for future in done:
+        pending.remove(future)
+        yield from future.result()
+
+
+def emit(solved, output, tagged=False):
+
+    '''Write every solution as a line as soon as it is ready, after its index
+    and a tab if tagged. Every line is flushed, so that a pipe or file gets it
+    before the stream ends. Returns the number of puzzles written.'''
+
+    count = 0
+
+    for index, solution in solved:
+
+        line = solution or ''
+
+        output.write(('%d\t%s\n' % (index, line)) if tagged else line + '\n')
+        output.flush()
+        count += 1
+
+    return count
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Solve large puzzle files as a stream.')
+    parser.add_argument('heuristic', help='MOMS, JW, JWTS, nishio, random, CDCL or VSIDS')
+    parser.add_argument('files', nargs='+', help="puzzle files or folders, or '-' for stdin")
+    parser.add_argument('--output', default='-', help='file to write the solutions to (default: stdout)')
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE, help='puzzles handed to a worker at once')
+    parser.add_argument('--window', type=int, default=WINDOW, help='chunks per worker on their way at once')
+    parser.add_argument('--unordered', action='store_true',
+                        help='write every solution once it is ready, tagged with its index')
+    parser.add_argument('--amo', action='store_true', help='native at-most-one constraints')
+    parser.add_argument('--bitmask', action='store_true', help='the bitmask backend for 9 x 9 puzzles too')
+    args = parser.parse_args()
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+
+    try:
+        solved = solve(encode(read(args.files)), args.heuristic, args.workers, args.chunksize, args.window,
+                       not args.unordered, args.amo, args.bitmask)
+        emit(solved, output, tagged=args.unordered)
+    finally:
+        if output is not sys.stdout:
+            output.close()
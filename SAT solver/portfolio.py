@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+'''
+    Portfolio solving: every heuristic is run on the same ruleset in a process
+    of its own, and the first one to finish gives the answer.
+
+    No heuristic is best on every puzzle, and the difference between them is
+    often orders of magnitude. Racing them makes the time for a puzzle close to
+    that of its best heuristic. As soon as one answer is in, the other
+    processes are terminated and waited for.
+'''
+
+import multiprocessing
+import queue
+
+from budget import UNKNOWN
+from cardinality import collapsed_formula
+from cdcl import CDCL_algorithm
+from dpll import DP_algorithm
+from watched import WatchedFormula
+
+# the heuristics that are raced, one process each
+PORTFOLIO = ["JW", "JWTS", "MOMS", "nishio", "random", "CDCL", "VSIDS"]
+
+# the seconds between two looks at workers that may have died
+POLL_INTERVAL = 0.5
+
+
+def solve(ruleset, heuristic, metrics=None, restarts=None, backend=None, budget=None,
+          cardinality=False, proof=None):
+
+    '''Solve a ruleset with one heuristic, CDCL included, and optionally a
+    restart policy, scores backend and budget. Returns the assigned literals,
+    an empty list if the ruleset is unsatisfiable, or UNKNOWN (None) if the
+    budget ran out. The metrics, if given, include the number of propagated
+    assignments. With cardinality, the pairwise at-most-one groups of the
+    ruleset are propagated as native constraints (see cardinality.py). With a
+    Proof (see proof.py), the clauses the search derives are logged to it.'''
+
+    # the watched literal structure is built once and updated in place
+    formula = collapsed_formula(ruleset) if cardinality else WatchedFormula(ruleset)
+
+    try:
+        if heuristic == "CDCL":
+            return CDCL_algorithm(formula, metrics, restarts=restarts, budget=budget, proof=proof)
+
+        return DP_algorithm(formula, heuristic, metrics, restarts=restarts, backend=backend,
+                            budget=budget, proof=proof)
+
+    finally:
+        if metrics is not None:
+            metrics['propagations'] += formula.propagations
+
+
+def solve_portfolio(ruleset, heuristics=PORTFOLIO, restarts=None, budget=None, cardinality=False):
+
+    '''Race the heuristics on a ruleset. Returns the heuristic that finished
+    first, together with its solution (an empty list if it found the ruleset
+    unsatisfiable). The other workers are stopped before this returns. With a
+    budget, which every heuristic gets in full, the result is (None, UNKNOWN)
+    if all of them ran out of it. A worker that dies without an answer, as
+    when it is killed, counts as a heuristic that failed.'''
+
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=run_heuristic,
+                                       args=(ruleset, heuristic, restarts, budget, cardinality, results),
+                                       daemon=True)
+               for heuristic in heuristics]
+
+    for worker in workers:
+        worker.start()
+
+    try:
+        # a heuristic that fails with an error or runs out of budget does
+        # not end the race
+        errors = []
+        answered = set()
+
+        # workers seen to have exited without an answer, and those given up on
+        exited = set()
+        lost = set()
+
+        while len(answered) + len(lost) < len(workers):
+
+            try:
+                heuristic, solution, error = results.get(timeout=POLL_INTERVAL)
+
+            except queue.Empty:
+
+                # a worker flushes its answer before it exits, so one that had
+                # already exited before this wait has none
+                for heuristic, worker in zip(heuristics, workers):
+
+                    if heuristic in exited and heuristic not in answered and heuristic not in lost:
+                        lost.add(heuristic)
+                        errors.append('%s exited with code %d' % (heuristic, worker.exitcode))
+
+                    elif worker.exitcode is not None:
+                        exited.add(heuristic)
+
+                continue
+
+            answered.add(heuristic)
+
+            if error is not None:
+                errors.append(error)
+            elif solution is not UNKNOWN:
+                return heuristic, solution
+
+        if len(errors) < len(workers):
+            return None, UNKNOWN
+
+        raise RuntimeError('every heuristic failed, the last one with: ' + errors[-1])
+
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+
+        for worker in workers:
+            worker.join()
+
+        results.close()
+
+
+def run_heuristic(ruleset, heuristic, restarts, budget, cardinality, results):
+
+    '''Solve a ruleset in a worker process and put the result on the queue.'''
+
+    try:
+        solution = solve(ruleset, heuristic, restarts=restarts, budget=budget, cardinality=cardinality)
+        results.put((heuristic, solution, None))
+    except Exception as error:
+        results.put((heuristic, None, repr(error)))
@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+'''
+    Simplification of a ruleset before the search.
+
+    The clauses are simplified by removing tautologies, removing clauses that
+    are subsumed by another clause, strengthening clauses by self-subsuming
+    resolution, and eliminating variables by resolution as long as that does
+    not increase the number of clauses (bounded variable elimination). Every
+    technique but the first has a time budget, after which it simply stops;
+    the formula is equivalent at any point.
+
+    Eliminated variables do not occur in the simplified formula, so they get
+    no value from the search. Their clauses are kept on a stack, from which
+    reconstruct_model derives their values afterwards.
+
+    Every clause that is strengthened or added follows from the clauses there
+    at that moment by unit propagation, so with a Proof (see proof.py) the
+    simplification is logged as additions and deletions, and a proof of the
+    simplified formula continues it into one of the original.
+'''
+
+import time
+from collections import defaultdict
+
+from dpll import has_tautology
+
+# the time in seconds each technique may take
+TIME_BUDGETS = {
+    'subsumption': 1.0,
+    'strengthening': 1.0,
+    'elimination': 2.0,
+}
+
+# variables with more occurrences than this (of both signs) are not eliminated
+MAX_OCCURRENCES = 16
+
+# and neither are variables whose elimination gives longer resolvents
+MAX_RESOLVENT_SIZE = 16
+
+
+def preprocess(ruleset, budgets=None, frozen=(), proof=None):
+
+    '''Simplify a ruleset. Returns the simplified clauses as tuples, together
+    with the clauses of the eliminated variables, to be passed to
+    reconstruct_model. The variables in frozen are never eliminated, for
+    instance because they will be assumed. If the ruleset turns out to be
+    unsatisfiable, the simplified clauses are a single empty clause. The
+    changes to the clauses are logged to the proof, if given.'''
+
+    preprocessor = Preprocessor(ruleset, frozen, proof)
+
+    if budgets is None:
+        budgets = TIME_BUDGETS
+    else:
+        budgets = dict(TIME_BUDGETS, **budgets)
+
+    preprocessor.remove_tautologies()
+    preprocessor.subsume(budgets['subsumption'], budgets['strengthening'])
+    preprocessor.eliminate(budgets['elimination'], budgets['subsumption'], budgets['strengthening'])
+
+    return preprocessor.result(), preprocessor.eliminated
+
+
+def reconstruct_model(solution, eliminated):
+
+    '''Extend a solution of the simplified formula with values for the
+    eliminated variables, so that it satisfies the original ruleset. The
+    variables are given their values in the reverse order of elimination.'''
+
+    true_literals = set(solution)
+    model = list(solution)
+
+    for variable, clauses in reversed(eliminated):
+
+        # variables the search left open are taken to be false
+        for clause in clauses:
+            for other in clause:
+                if abs(other) != variable and other not in true_literals and -other not in true_literals:
+                    true_literals.add(-abs(other))
+                    model.append(-abs(other))
+
+        # false, unless a clause with the positive literal needs it to be true
+        literal = -variable
+
+        for clause in clauses:
+            if variable in clause and true_literals.isdisjoint(clause):
+                literal = variable
+                break
+
+        true_literals.add(literal)
+        model.append(literal)
+
+    return model
+
+
+class Preprocessor(object):
+
+    '''The clauses being simplified, as frozensets indexed by position, with
+    occurrence lists per literal. A removed clause is set to None. Added,
+    strengthened and removed clauses are logged to the proof, if any.'''
+
+    def __init__(self, ruleset, frozen=(), proof=None):
+
+        self.clauses = [frozenset(clause) for clause in ruleset]
+        self.frozen = set(abs(literal) for literal in frozen)
+        self.occurs = defaultdict(set)
+        self.proof = proof
+
+        for index, clause in enumerate(self.clauses):
+            for literal in clause:
+                self.occurs[literal].add(index)
+
+        # (variable, clauses) per eliminated variable, in order of elimination
+        self.eliminated = []
+
+        # set when the empty clause is derived
+        self.unsatisfiable = any(not clause for clause in self.clauses)
+
+        # the clauses that still have to be checked for subsumption
+        self.queue = set(range(len(self.clauses)))
+
+    def result(self):
+
+        if self.unsatisfiable:
+            return [()]
+
+        return [tuple(sorted(clause, key=abs)) for clause in self.clauses if clause is not None]
+
+    def add(self, clause):
+
+        index = len(self.clauses)
+        self.clauses.append(clause)
+
+        if self.proof is not None:
+            self.proof.add(clause)
+
+        for literal in clause:
+            self.occurs[literal].add(index)
+
+        if not clause:
+            self.unsatisfiable = True
+
+        self.queue.add(index)
+
+        return index
+
+    def remove(self, index):
+
+        for literal in self.clauses[index]:
+            self.occurs[literal].discard(index)
+
+        if self.proof is not None:
+            self.proof.delete(self.clauses[index])
+
+        self.clauses[index] = None
+
+    def strengthen(self, index, literal):
+
+        '''Remove a literal from a clause.'''
+
+        clause = self.clauses[index]
+
+        self.occurs[literal].discard(index)
+        self.clauses[index] = clause - {literal}
+
+        # the shorter clause is derived before the longer one goes
+        if self.proof is not None:
+            self.proof.add(self.clauses[index])
+            self.proof.delete(clause)
+
+        if not self.clauses[index]:
+            self.unsatisfiable = True
+
+        self.queue.add(index)
+
+    def remove_tautologies(self):
+
+        for index, clause in enumerate(self.clauses):
+            if clause is not None and has_tautology(clause):
+                self.remove(index)
+
+    def subsume(self, subsumption_budget, strengthening_budget):
+
+        '''Backward subsumption and self-subsuming resolution: every queued
+        clause removes the clauses it subsumes, and removes the negation of one
+        of its literals from the clauses it subsumes but for that literal.
+        Strengthened clauses are queued again.'''
+
+        start = time.perf_counter()
+        subsumption_deadline = start + subsumption_budget
+        strengthening_deadline = start + strengthening_budget
+
+        clauses = self.clauses
+        occurs = self.occurs
+
+        while self.queue and not self.unsatisfiable:
+
+            now = time.perf_counter()
+            strengthening = now < strengthening_deadline
+
+            if now >= subsumption_deadline:
+                break
+
+            # short clauses subsume the most, so they go first
+            queued = sorted(self.queue, key=lambda index: len(clauses[index] or ()))
+            self.queue = set()
+
+            for index in queued:
+
+                clause = clauses[index]
+
+                if self.unsatisfiable:
+                    return
+
+                if clause is None:
+                    continue
+
+                if time.perf_counter() >= subsumption_deadline:
+                    self.queue.update(queued)
+                    break
+
+                # every candidate contains the least occurring variable of the clause
+                variable = min(clause, key=lambda literal: len(occurs[literal]) + len(occurs[-literal]))
+
+                for other in list(occurs[variable] | occurs[-variable]):
+
+                    target = clauses[other]
+
+                    if other == index or target is None or len(target) < len(clause):
+                        continue
+
+                    difference = clause - target
+
+                    if not difference:
+                        self.remove(other)
+
+                    elif strengthening and len(difference) == 1:
+
+                        literal, = difference
+
+                        if -literal in target:
+                            self.strengthen(other, -literal)
+
+    def forward_subsumed(self, clause):
+
+        '''Whether a clause is subsumed by one of the clauses already there.'''
+
+        clauses = self.clauses
+
+        for literal in clause:
+            for index in self.occurs[literal]:
+
+                other = clauses[index]
+
+                if len(other) <= len(clause) and other <= clause:
+                    return True
+
+        return False
+
+    def resolvents(self, variable):
+
+        '''The non-tautological resolvents on a variable, or None if there are
+        more of them than clauses they would replace, or if one is too long.'''
+
+        clauses = self.clauses
+        positive = [clauses[index] - {variable} for index in self.occurs[variable]]
+        negative = [clauses[index] - {-variable} for index in self.occurs[-variable]]
+
+        limit = len(positive) + len(negative)
+        resolvents = []
+
+        for first in positive:
+            for second in negative:
+
+                if any(-literal in second for literal in first):
+                    continue
+
+                resolvent = first | second
+
+                if len(resolvent) > MAX_RESOLVENT_SIZE or len(resolvents) == limit:
+                    return None
+
+                resolvents.append(resolvent)
+
+        return resolvents
+
+    def eliminate(self, budget, subsumption_budget, strengthening_budget):
+
+        '''Bounded variable elimination: replace the clauses of a variable by
+        their resolvents, if there are no more of those. Variables that occur
+        least are tried first, and the variables of the new clauses are tried
+        again. The new clauses are used for subsumption as well.'''
+
+        deadline = time.perf_counter() + budget
+        occurs = self.occurs
+
+        def cost(variable):
+            return len(occurs[variable]) * len(occurs[-variable])
+
+        candidates = set(abs(literal) for literal in list(occurs)) - self.frozen
+        done = set()
+
+        while candidates and not self.unsatisfiable:
+
+            touched = set()
+
+            for variable in sorted(candidates, key=lambda variable: (cost(variable), variable)):
+
+                if time.perf_counter() >= deadline or self.unsatisfiable:
+                    return
+
+                if variable in done:
+                    continue
+
+                positive, negative = occurs[variable], occurs[-variable]
+
+                if not positive and not negative:
+                    continue
+
+                if len(positive) + len(negative) > MAX_OCCURRENCES and positive and negative:
+                    continue
+
+                resolvents = self.resolvents(variable)
+
+                if resolvents is None:
+                    continue
+
+                # keep the clauses of the variable to reconstruct its value
+                removed = list(positive | negative)
+                self.eliminated.append((variable, [tuple(self.clauses[index]) for index in removed]))
+                done.add(variable)
+
+                # the resolvents are added while the clauses they are derived
+                # from are still there, as a proof needs
+                for resolvent in resolvents:
+                    if not self.forward_subsumed(resolvent):
+                        self.add(resolvent)
+                        touched.update(abs(literal) for literal in resolvent)
+
+                for index in removed:
+                    self.remove(index)
+
+            # the new clauses may subsume others, which makes more variables cheap
+            remaining = deadline - time.perf_counter()
+            self.subsume(min(subsumption_budget, remaining), min(strengthening_budget, remaining))
+
+            candidates = touched - done - self.frozen
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+'''
+    DRAT proofs, so that an answer of unsatisfiable can be checked by an
+    independent checker such as drat-trim:
+
+        drat-trim problem.cnf problem.drat
+
+    A proof lists the clauses the solver derived, each of which follows from
+    the clauses before it by unit propagation, and the clauses it deleted,
+    ending with the empty clause. The binary format writes 'a' or 'd' and
+    then every literal as the number 2 * variable (+ 1 if negative), seven
+    bits per byte with the high bit set on all bytes but the last, and a 0
+    byte after the clause. The text format writes a line per clause as in
+    DIMACS, with 'd ' before a deletion. Binary proofs take less than half
+    the space.
+
+    The encoding of every literal is computed once, and clauses are collected
+    in a buffer of BUFFER_SIZE bytes that is written out in one go when it is
+    full, so the search is hardly slowed down by it. The proof may be written
+    to a file, compressed if its name ends in .gz, .xz, .lzma or .bz2 (see
+    dimacs.py), to stdout as '-', or to any binary file object, such as a
+    pipe to a checker.
+
+        with Proof('problem.drat.gz') as proof:
+            solution = solve(ruleset, "CDCL", proof=proof)
+'''
+
+import sys
+
+from dimacs import OPENERS
+
+# the bytes collected before they are written out
+BUFFER_SIZE = 1 << 20
+
+
+class BinaryCodes(dict):
+
+    '''The binary DRAT encoding of every literal, computed when first asked for.'''
+
+    def __missing__(self, literal):
+
+        number = 2 * abs(literal) + (literal < 0)
+        code = bytearray()
+
+        while number > 127:
+            code.append(number & 127 | 128)
+            number >>= 7
+
+        code.append(number)
+        self[literal] = code = bytes(code)
+
+        return code
+
+
+class TextCodes(dict):
+
+    '''The DIMACS text of every literal, with the space after it.'''
+
+    def __missing__(self, literal):
+
+        self[literal] = code = b'%d ' % literal
+
+        return code
+
+
+class Proof(object):
+
+    '''A DRAT proof being written, in binary unless binary is False. The output
+    is a filename, '-' for stdout, or a binary file object, which is left open
+    by close().'''
+
+    def __init__(self, output, binary=True, buffer_size=BUFFER_SIZE):
+
+        self.binary = binary
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+
+        if binary:
+            self.codes = BinaryCodes()
+            self.added, self.deleted, self.end = b'a', b'd', b'\0'
+        else:
+            self.codes = TextCodes()
+            self.added, self.deleted, self.end = b'', b'd ', b'0\n'
+
+        self.owned = isinstance(output, str) and output != '-'
+
+        if output == '-':
+            self.file = sys.stdout.buffer
+        elif self.owned:
+            self.file = open_output(output)
+        else:
+            self.file = output
+
+        # the number of clauses added and deleted so far
+        self.additions = 0
+        self.deletions = 0
+
+    def add(self, clause):
+
+        '''Log a clause that follows from the earlier ones by unit propagation.'''
+
+        self.write(self.added, clause)
+        self.additions += 1
+
+    def delete(self, clause):
+
+        '''Log a clause that is no longer used.'''
+
+        self.write(self.deleted, clause)
+        self.deletions += 1
+
+    def write(self, kind, clause):
+
+        codes = self.codes
+        buffer = self.buffer
+
+        buffer += kind
+
+        for literal in clause:
+            buffer += codes[literal]
+
+        buffer += self.end
+
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+
+        '''Write out the buffered clauses.'''
+
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+        self.file.flush()
+
+    def close(self):
+
+        if self.file is None:
+            return
+
+        self.flush()
+
+        if self.owned:
+            self.file.close()
+
+        self.file = None
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        self.close()
+
+
+def open_output(filename):
+
+    '''Open a file to write a proof to, compressed by its extension.'''
+
+    for extension, opener in OPENERS.items():
+        if filename.endswith(extension):
+            return opener(filename, 'wb')
+
+    return open(filename, 'wb')
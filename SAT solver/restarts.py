@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+'''
+    Restart schedules for the search.
+
+    A restart undoes every decision but keeps what the search has learned: the
+    saved phases, the VSIDS activities and, for CDCL, the learned clauses. It
+    limits the damage of an early bad decision, which would otherwise keep the
+    search in a huge subtree. Each schedule is told about every conflict, and
+    answers whether the search should restart now:
+
+    * luby: after unit * 1, 1, 2, 1, 1, 2, 4, 1, ... conflicts.
+    * geometric: after first, first * factor, first * factor ** 2, ... conflicts.
+    * glucose: when the clauses of the recent conflicts span more decision
+      levels (LBD) than those of all conflicts so far, on average.
+
+    The DPLL search learns no clauses, so it only finishes if the time between
+    restarts keeps growing. The first two schedules do that by themselves; the
+    glucose schedule raises its minimum distance between restarts every time.
+'''
+
+from collections import deque
+
+RESTART_POLICIES = ["luby", "geometric", "glucose"]
+
+
+def restart_policy(name):
+
+    '''The restart schedule with the given name, or None for no restarts.'''
+
+    if name is None:
+        return None
+
+    if name == "luby":
+        return LubyRestarts()
+
+    if name == "geometric":
+        return GeometricRestarts()
+
+    if name == "glucose":
+        return GlucoseRestarts()
+
+    raise ValueError('unknown restart policy %r, choose from %s' % (name, ', '.join(RESTART_POLICIES)))
+
+
+def luby(index):
+
+    '''The index-th element (from 0) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ...'''
+
+    # find the complete subsequence of 2 ** power - 1 elements the index is in
+    size = 1
+    power = 0
+
+    while size < index + 1:
+        size = 2 * size + 1
+        power += 1
+
+    # and the smaller subsequences within it, until the index is the last
+    while size - 1 != index:
+        size = (size - 1) >> 1
+        power -= 1
+        index = index % size
+
+    return 1 << power
+
+
+class LubyRestarts(object):
+
+    def __init__(self, unit=32):
+
+        self.unit = unit
+        self.restarts = 0
+        self.conflicts = 0
+
+    def conflict(self, lbd):
+
+        self.conflicts += 1
+
+        if self.conflicts < self.unit * luby(self.restarts):
+            return False
+
+        self.restarts += 1
+        self.conflicts = 0
+
+        return True
+
+
+class GeometricRestarts(object):
+
+    def __init__(self, first=100, factor=1.5):
+
+        self.limit = first
+        self.factor = factor
+        self.conflicts = 0
+
+    def conflict(self, lbd):
+
+        self.conflicts += 1
+
+        if self.conflicts < self.limit:
+            return False
+
+        self.limit *= self.factor
+        self.conflicts = 0
+
+        return True
+
+
+class GlucoseRestarts(object):
+
+    def __init__(self, window=50, margin=0.8, growth=1.1):
+
+        # the LBDs of the last conflicts, and the sum of those and of all
+        self.recent = deque(maxlen=window)
+        self.recent_sum = 0
+        self.total_sum = 0
+        self.total_count = 0
+
+        self.margin = margin
+        self.growth = growth
+
+        # the least number of conflicts between restarts
+        self.minimum = window
+        self.conflicts = 0
+
+    def conflict(self, lbd):
+
+        recent = self.recent
+
+        if len(recent) == recent.maxlen:
+            self.recent_sum -= recent[0]
+
+        recent.append(lbd)
+        self.recent_sum += lbd
+        self.total_sum += lbd
+        self.total_count += 1
+        self.conflicts += 1
+
+        if self.conflicts < self.minimum or len(recent) < recent.maxlen:
+            return False
+
+        # restart when the recent conflicts are worse than average
+        if self.recent_sum * self.margin * self.total_count <= self.total_sum * len(recent):
+            return False
+
+        recent.clear()
+        self.recent_sum = 0
+        self.conflicts = 0
+        self.minimum *= self.growth
+
+        return True
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+'''
+    A sudoku rule base that is parsed and preprocessed once, and then used to
+    solve many puzzles.
+
+    Every puzzle shares the same rules and differs only in its givens. So
+    instead of writing the rules into a DIMACS file per puzzle, the rules are
+    loaded once into an incremental solver (see solver.py), and every puzzle is
+    solved by passing its givens to the search as assumptions.
+'''
+
+import os
+
+from budget import UNKNOWN
+from dimacs import parse_DIMACS
+from grid import puzzle_givens
+from preprocess import preprocess
+from solver import Solver
+
+RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sudoku-rules.txt')
+
+# the rule bases of this process, with and without native at-most-one
+# constraints, see shared_rule_base
+SHARED = {}
+
+
+class RuleBase(object):
+
+    '''The preprocessed sudoku rules, with one solver per heuristic that is
+    reused from puzzle to puzzle.'''
+
+    def __init__(self, filename=RULES, cardinality=False):
+
+        ruleset, variables = parse_DIMACS(filename)
+
+        # remove tautologies and subsumed clauses (this only has to be done
+        # once); every variable may be given, so none can be eliminated
+        self.ruleset, _ = preprocess(ruleset, frozen=range(1, variables + 1))
+        self.variables = variables
+
+        # whether the solvers propagate the at-most-one groups natively
+        self.cardinality = cardinality
+
+        # per heuristic and restart policy
+        self.solvers = {}
+
+    def solver(self, heuristic, restarts=None):
+
+        '''The solver for a heuristic, built the first time it is needed.'''
+
+        if (heuristic, restarts) not in self.solvers:
+            self.solvers[heuristic, restarts] = Solver(self.ruleset, heuristic, restarts,
+                                                       cardinality=self.cardinality)
+
+        return self.solvers[heuristic, restarts]
+
+    def solve(self, givens, heuristic, metrics=None, restarts=None, budget=None):
+
+        '''Solve the rules together with the given literals. Returns the
+        assigned literals, an empty list if there is no solution, or UNKNOWN
+        (None) if the budget ran out.'''
+
+        solver = self.solver(heuristic, restarts)
+        satisfiable = solver.solve(givens, metrics, budget)
+
+        if satisfiable is None:
+            return UNKNOWN
+
+        if not satisfiable:
+            return []
+
+        return solver.get_model()
+
+
+def shared_rule_base(cardinality=False):
+
+    '''The rule base of this process, parsed the first time it is needed. A
+    worker process that solves many puzzles keeps it warm between them.'''
+
+    if cardinality not in SHARED:
+        SHARED[cardinality] = RuleBase(cardinality=cardinality)
+
+    return SHARED[cardinality]
+
+
+def read_puzzle_collection(folder):
+
+    '''Read all puzzles from the files in a folder, numbered in the same order
+    as clean_DIMACS.py numbers its sudoku_nr_*.txt files.'''
+
+    return list(iter_puzzle_collection(folder))
+
+
+def iter_puzzle_collection(folder):
+
+    '''The puzzles in the files in a folder, in the order of
+    read_puzzle_collection, read one line at a time.'''
+
+    for filename in os.scandir(folder):
+
+        with open(filename) as file:
+            for line in file:
+
+                # as clean_DIMACS.py, blank lines are not numbered
+                if line.strip():
+                    yield line
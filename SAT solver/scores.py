@@ -0,0 +1,467 @@
+#!/usr/bin/env python
+'''
+    Incrementally maintained heuristic scores for the DPLL search in dpll.py.
+
+    The heuristics only look at the clauses that are not yet satisfied, and
+    only at their unassigned literals. Instead of recounting those at every
+    decision, the scores are updated whenever a literal is assigned or
+    unassigned, touching only the clauses that literal occurs in. The best
+    literal is then taken from a priority structure, into which only the
+    literals whose score changed since the last decision are pushed again.
+'''
+
+import heapq
+import random
+from array import array
+from collections import defaultdict
+
+
+class LazyHeap(object):
+
+    '''A heap of keys with priorities that may go stale. Entries are checked
+    against the current priority when they reach the top, and dropped if they
+    no longer match.'''
+
+    def __init__(self, priority, valid):
+
+        self.priority = priority
+        self.valid = valid
+        self.heap = []
+
+    def push(self, key):
+
+        heapq.heappush(self.heap, (self.priority(key), key))
+
+    def top(self):
+
+        '''Return the key with the lowest current priority, or None.'''
+
+        heap = self.heap
+
+        while heap:
+            priority, key = heap[0]
+
+            if self.valid(key) and self.priority(key) == priority:
+                return key
+
+            heapq.heappop(heap)
+
+        return None
+
+    def rebuild(self, keys):
+
+        '''Replace all entries by fresh ones for the given keys.'''
+
+        self.heap = [(self.priority(key), key) for key in keys if self.valid(key)]
+        heapq.heapify(self.heap)
+
+
+class FenwickTree(object):
+
+    '''Prefix sums over integer weights, used to draw a literal occurrence at
+    random in logarithmic time.'''
+
+    def __init__(self, size):
+
+        self.size = size
+        self.tree = [0] * (size + 1)
+        self.weights = [0] * size
+
+    def set(self, index, weight):
+
+        delta = weight - self.weights[index]
+        self.weights[index] = weight
+        index += 1
+
+        while index <= self.size:
+            self.tree[index] += delta
+            index += index & -index
+
+    def total(self):
+
+        index = self.size
+        total = 0
+
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+
+        return total
+
+    def find(self, target):
+
+        '''Return the index at which the running sum of weights exceeds target.'''
+
+        index = 0
+        step = 1 << self.size.bit_length()
+
+        while step:
+            following = index + step
+
+            if following <= self.size and self.tree[following] <= target:
+                index = following
+                target -= self.tree[following]
+
+            step >>= 1
+
+        return index
+
+
+class HeuristicScores(object):
+
+    '''Literal scores over the unsatisfied part of a ruleset, kept up to date
+    by assign() and unassign(). Only the structures needed by the given
+    heuristic are maintained.'''
+
+    def __init__(self, ruleset, heuristic):
+
+        self.ruleset = ruleset
+        self.heuristic = heuristic
+
+        self.use_jw = heuristic in ("JW", "JWTS")
+        self.use_moms = heuristic in ("MOMS", "MOM")
+
+        # the clauses every literal occurs in
+        self.occurs = defaultdict(lambda: array('i'))
+
+        for index, clause in enumerate(ruleset):
+            for literal in clause:
+                self.occurs[literal].append(index)
+
+        # per clause: the number of true literals and of unassigned literals
+        self.satisfied = array('i', [0]) * len(ruleset)
+        self.free = array('i', [len(clause) for clause in ruleset])
+
+        # the literals that have a value, in both polarities
+        self.assigned = set()
+
+        # the Jeroslow-Wang weight 2 ** -k, scaled to integers so that it can
+        # be added and subtracted again without rounding
+        longest = max([len(clause) for clause in ruleset] + [0])
+        self.weights = [1 << (longest - k) for k in range(longest + 1)]
+
+        # per literal: occurrences and Jeroslow-Wang weight in unsatisfied clauses
+        self.counts = defaultdict(int)
+        self.jw = defaultdict(int)
+
+        # MOMs: per clause size, the number of unsatisfied clauses and the
+        # occurrences of every literal in them
+        self.sizes = defaultdict(int)
+        self.moms = defaultdict(lambda: defaultdict(int))
+        self.moms_heaps = {}
+
+        # the number of clauses that are not yet satisfied
+        self.open_clauses = 0
+
+        # literals that occur while their negation does not
+        self.pure = set()
+
+        # the literals whose score changed since the last decision
+        self.changed = set()
+
+        for index in range(len(ruleset)):
+            self.contribute(index, 1)
+
+        counts = self.counts
+
+        self.jw_heap = LazyHeap(lambda lit: (-self.jw[lit], abs(lit), -lit),
+                                lambda lit: counts[lit] > 0)
+        self.jwts_heap = LazyHeap(lambda var: (-self.jw[var] - self.jw[-var], var),
+                                  lambda var: counts[var] > 0 or counts[-var] > 0)
+        self.nishio_heap = LazyHeap(lambda lit: (counts[lit], -lit),
+                                    lambda lit: counts[lit] > 0)
+
+        # every literal gets a slot in the tree used for random selection
+        self.literals = sorted(self.occurs)
+        self.slots = dict((literal, slot) for slot, literal in enumerate(self.literals))
+        self.occurrences = FenwickTree(len(self.literals))
+
+        self.refresh(self.literals)
+
+    def contribute(self, index, sign):
+
+        '''Add (sign 1) or remove (sign -1) the contribution of an unsatisfied
+        clause, given the current assignment.'''
+
+        assigned = self.assigned
+        counts = self.counts
+        pure = self.pure
+        changed = self.changed
+        size = self.free[index]
+
+        self.open_clauses += sign
+        self.sizes[size] += sign
+
+        use_jw = self.use_jw
+        use_moms = self.use_moms
+        jw = self.jw
+        weight = sign * self.weights[size]
+        moms = self.moms[size]
+
+        for literal in self.ruleset[index]:
+
+            if literal in assigned:
+                continue
+
+            count = counts[literal] + sign
+            counts[literal] = count
+            changed.add(literal)
+
+            if use_jw:
+                jw[literal] += weight
+
+            if use_moms:
+                moms[literal] += sign
+
+            # a literal can only become or stop being pure when its count
+            # moves between zero and one
+            if count == 0:
+                pure.discard(literal)
+
+                if counts[-literal] > 0:
+                    pure.add(-literal)
+
+            elif count == 1 and sign == 1:
+                pure.discard(-literal)
+
+                if counts[-literal] == 0:
+                    pure.add(literal)
+
+    def resize(self, index, removed, sign):
+
+        '''Shorten (sign -1) or lengthen (sign 1) an unsatisfied clause by the
+        literal removed, which is false. Only the weights of the other
+        unassigned literals change, since their clause changes size.'''
+
+        assigned = self.assigned
+        counts = self.counts
+        pure = self.pure
+        changed = self.changed
+        size = self.free[index]
+        new_size = size + sign
+
+        self.sizes[size] -= 1
+        self.sizes[new_size] += 1
+
+        use_jw = self.use_jw
+        use_moms = self.use_moms
+        jw = self.jw
+
+        # the removed literal counts at the longer of the two sizes
+        longer = max(size, new_size)
+        count = counts[removed] + sign
+        counts[removed] = count
+        changed.add(removed)
+
+        if use_jw:
+            jw[removed] += sign * self.weights[longer]
+
+        if use_moms:
+            self.moms[longer][removed] += sign
+
+        if count == 0:
+            pure.discard(removed)
+
+            if counts[-removed] > 0:
+                pure.add(-removed)
+
+        elif count == 1 and sign == 1:
+            pure.discard(-removed)
+
+            if counts[-removed] == 0:
+                pure.add(removed)
+
+        if not (use_jw or use_moms):
+            return
+
+        difference = self.weights[new_size] - self.weights[size]
+        old_moms = self.moms[size]
+        new_moms = self.moms[new_size]
+
+        for literal in self.ruleset[index]:
+
+            if literal == removed or literal in assigned:
+                continue
+
+            changed.add(literal)
+
+            if use_jw:
+                jw[literal] += difference
+
+            if use_moms:
+                old_moms[literal] -= 1
+                new_moms[literal] += 1
+
+    def assign(self, literal):
+
+        '''Update the scores for a literal that has become true.'''
+
+        satisfied = self.satisfied
+        free = self.free
+
+        for index in self.occurs[literal]:
+
+            # the clause is satisfied now, so it no longer counts
+            if satisfied[index] == 0:
+                self.contribute(index, -1)
+
+            satisfied[index] += 1
+            free[index] -= 1
+
+        for index in self.occurs[-literal]:
+
+            # the clause loses a literal, and counts with its new size
+            if satisfied[index] == 0:
+                self.resize(index, -literal, -1)
+
+            free[index] -= 1
+
+        self.assigned.add(literal)
+        self.assigned.add(-literal)
+
+    def unassign(self, literal):
+
+        '''Update the scores for a literal whose assignment is undone. This is
+        the exact reverse of assign().'''
+
+        satisfied = self.satisfied
+        free = self.free
+
+        self.assigned.discard(literal)
+        self.assigned.discard(-literal)
+
+        for index in self.occurs[-literal]:
+
+            if satisfied[index] == 0:
+                self.resize(index, -literal, 1)
+
+            free[index] += 1
+
+        for index in self.occurs[literal]:
+            free[index] += 1
+            satisfied[index] -= 1
+
+            if satisfied[index] == 0:
+                self.contribute(index, 1)
+
+    def refresh(self, literals):
+
+        '''Push the literals whose score changed into the structure of the
+        heuristic in use.'''
+
+        heuristic = self.heuristic
+
+        if heuristic == "JW":
+            for literal in literals:
+                self.jw_heap.push(literal)
+
+        elif heuristic == "JWTS":
+            for var in set(abs(literal) for literal in literals):
+                self.jwts_heap.push(var)
+
+        elif heuristic == "nishio":
+            for literal in literals:
+                if literal < 0:
+                    self.nishio_heap.push(literal)
+
+        elif heuristic == "VSIDS":
+            pass
+
+        elif heuristic in ("MOMS", "MOM"):
+            for size, counts in self.moms.items():
+                heap = self.moms_heap(size)
+
+                for literal in literals:
+                    if counts[literal] > 0:
+                        heap.push(literal)
+
+        else:
+            slots = self.slots
+            counts = self.counts
+
+            for literal in literals:
+                self.occurrences.set(slots[literal], counts[literal])
+
+        self.changed = set()
+
+    def moms_heap(self, size):
+
+        '''The heap of literals by their occurrences in clauses of one size.'''
+
+        if size not in self.moms_heaps:
+            counts = self.moms[size]
+            self.moms_heaps[size] = LazyHeap(lambda lit: (-counts[lit], abs(lit), -lit),
+                                             lambda lit: counts[lit] > 0)
+
+        return self.moms_heaps[size]
+
+    def prepare(self):
+
+        '''Bring the priority structures up to date before a decision, and
+        rebuild them when stale entries have piled up.'''
+
+        self.refresh(self.changed)
+
+        limit = 4 * len(self.literals) + 1024
+
+        if len(self.jw_heap.heap) > limit:
+            self.jw_heap.rebuild(self.literals)
+
+        if len(self.jwts_heap.heap) > limit:
+            self.jwts_heap.rebuild(set(abs(literal) for literal in self.literals))
+
+        if len(self.nishio_heap.heap) > limit:
+            self.nishio_heap.rebuild([literal for literal in self.literals if literal < 0])
+
+        for heap in self.moms_heaps.values():
+            if len(heap.heap) > limit:
+                heap.rebuild(self.literals)
+
+    def best_JW(self):
+
+        '''The literal with the highest one-sided Jeroslow-Wang weight.'''
+
+        self.prepare()
+
+        return self.jw_heap.top()
+
+    def best_JWTS(self):
+
+        '''The variable with the highest two-sided Jeroslow-Wang weight, with
+        the polarity that has the highest weight.'''
+
+        self.prepare()
+        var = self.jwts_heap.top()
+
+        return var if self.jw[var] > self.jw[-var] else -var
+
+    def best_MOMs(self):
+
+        '''The literal occurring most often in the clauses of minimum size.'''
+
+        self.prepare()
+        minsize = min(size for size, count in self.sizes.items() if count > 0)
+
+        return self.moms_heap(minsize).top()
+
+    def best_nishio(self):
+
+        '''The positive literal with the fewest negative occurrences left.'''
+
+        self.prepare()
+        selected_lit = self.nishio_heap.top()
+
+        # if no negative literal is left, any literal that still occurs will do
+        if selected_lit is None:
+            return max(self.counts, key=lambda key: self.counts[key])
+
+        return -selected_lit
+
+    def random_literal(self):
+
+        '''A literal drawn uniformly from all literal occurrences.'''
+
+        self.prepare()
+        target = random.randrange(self.occurrences.total())
+
+        return self.literals[self.occurrences.find(target)]
@@ -1,325 +1,85 @@
 #!/usr/bin/env python
 '''
-    Davis-Putnam-LL SAT solver. This version includes metrics for analysis.
-    It should be called from runner.py. For the 'plain' version, look at SAT.py.
+    Davis-Putnam-LL SAT solver, with the metrics for analysis. The functions
+    here are called from runner.py, in its worker processes. They run the same
+    search as SAT.py, which can write a profile with the same counters and
+    timers of every phase (see instrument.py).
 '''
 
+import os
 import sys
-import random
 from collections import Counter
-from itertools import chain
-import csv
 
-heuristic = sys.argv[1]
+# the solver itself lives next to SAT.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from budget import UNKNOWN
+from dpll import check_tautologies, read_DIMACS
+from portfolio import solve
+from rulebase import RuleBase, puzzle_givens
 
-# metrics to keep track of
-tried_assignments = 0
-backtracks = 0
+# the sudoku rules, loaded once per process by solve_sudoku
+rule_base = None
 
-def start_DPLL(timestamp, *args):
+def solve_puzzle(puzzle, heuristic, restarts=None, budget=None):
 
-    global tried_assignments
-    global backtracks
-    tried_assignments = 0
-    backtracks = 0
-
-    # read puzzle from either function input or command line
-    if len(args) > 0:
-        puzzle = args[0]
-    else:
-        puzzle = sys.argv[2]
+    '''Solve one puzzle from the dimacs_sudokus folder with the given heuristic.
+    Returns the puzzle id, the tried assignments, the backtracks and whether a
+    solution was found: True, False, or None if the budget ran out. With a
+    restart policy, the restarts and the decisions that took a saved phase
+    come after the backtracks. Nothing is written, so this can run in a
+    worker process.'''
 
     puzzleid = ''.join(i for i in puzzle if i.isdigit())
-    name_logfile = '../results/log_' + heuristic + '_' + timestamp + '.csv'
 
-    ruleset = read_DIMACS(puzzle)
+    ruleset = read_DIMACS('../dimacs_sudokus/' + puzzle)
 
     # remove tautologies (this only has to be done once)
     ruleset = check_tautologies(ruleset)
 
-    solution = DP_algorithm(ruleset, [])
-
-    # test whether the algorithm has returned a solution
-    if solution:
-
-        with open(name_logfile, 'a') as logfile:
-            w = csv.writer(logfile)
-            w.writerow([puzzleid, tried_assignments, backtracks])
-
-        print('Success!')
-
-    else:
-        print(tried_assignments)
-        print('This problem is unsatisfiable.')
-
-
-def DP_algorithm(ruleset, assigned_literals):
-
-    global tried_assignments
-    global backtracks
-    # first run the simplifcation rules
-    ruleset, pure_assigned = check_pure_literals(ruleset)
-    ruleset, unit_assigned = check_unit_clauses(ruleset)
-
-    assigned_literals = assigned_literals + pure_assigned + unit_assigned
-
-    # if we have received a -1, we have failed
-    if ruleset == -1:
-        return []
-
-    # if the ruleset is empty, we have found a solution
-    if len(ruleset) == 0:
-        return assigned_literals
-
-    # we have not yet found a solution, so we assign a new literal
-    # by the determined method and run the algorithm with it
-    tried_assignments += 1
-    if heuristic == "JW":
-        new_literal = assign_new_literal_JW(ruleset)
-
-    elif heuristic == "JWTS":
-        new_literal = assign_new_literal_JWTS(ruleset)
-
-    elif heuristic == "nishio":
-        new_literal = assign_new_literal_nishio(ruleset)
-
-    elif heuristic == "MOM":
-        new_literal = assign_new_literal_MOMs(ruleset)
-
-    else:
-        new_literal = assign_new_literal_random(ruleset)
-
-    # recursively call into the algorithm with the new literal assigned
-    solution = DP_algorithm(update_ruleset(ruleset, new_literal), assigned_literals + [new_literal])
-
-    # if we fail to find a solution, we try again with the negated literal
-    if not solution:
-        backtracks += 1
-        solution = DP_algorithm(update_ruleset(ruleset, -new_literal), assigned_literals + [-new_literal])
-
-    return solution
-
-
-def update_ruleset(ruleset, literal):
-
-    '''Updating the ruleset: remove clauses that contain the literal, and
-    remove the negation of the literal from the clauses.'''
-
-    updated_ruleset = []
-
-    for clause in ruleset:
-
-        # a clause that contains the literal can now be removed
-        if literal in clause:
-            continue
-
-        # a clause that contains the negated literal is updated
-        if -literal in clause:
-            clause = set(lit for lit in clause if lit != -literal)
-
-            # if we have an empty clause, we have failed
-            if len(clause) == 0:
-                return -1
-
-        updated_ruleset.append(clause)
-
-    return updated_ruleset
-
-
-def check_pure_literals(ruleset):
-
-    '''Check for pure literals and return them as a list, plus updated ruleset.'''
-
-    # extracting all literals present
-    all_literals = set(chain.from_iterable(ruleset))
-
-    # storing pure literals
-    pure_literals = []
-
-    # a literal is pure if its negative does not occur
-    for literal in all_literals:
-        if -literal not in all_literals:
-            pure_literals.append(literal)
-
-    # update the ruleset: all clauses containing pure literals are now
-    # satisfied, so they can be removed
-    for literal in pure_literals:
-        ruleset = update_ruleset(ruleset, literal)
-
-    return ruleset, pure_literals
-
-
-def check_unit_clauses(ruleset):
-
-    '''Checking for unit clauses and return them as a list, plus updated ruleset.'''
-
-    assigned_literals = []
-
-    # select all unit clauses: those with length 1
-    unit_clauses = [clause for clause in ruleset if len(clause) == 1]
-
-    while len(unit_clauses) > 0:
-
-        # select the first unit clause that is still available
-        unit_clause1 = unit_clauses[0]
-
-        # awkwardly select the (only) element from the set
-        for unit in unit_clause1:
-            unit_clause = unit
+    # the watched literal structure is built once and updated in place
+    metrics = Counter()
 
-        # update the ruleset: remove the unit clauses, and their negated
-        # literals from within other clauses
-        ruleset = update_ruleset(ruleset, unit_clause)
+    solution = solve(ruleset, heuristic, metrics, restarts, budget=budget)
 
-        assigned_literals.append(unit_clause)
+    return (puzzleid,) + metrics_row(metrics, heuristic, restarts) + (outcome(solution),)
 
-        # if instead of a ruleset we received -1, we have failed (empty clause)
-        if ruleset == -1:
-            return -1, []
 
-        # if the returned ruleset is empty, we have succeeded (so return it)
-        if len(ruleset) == 0:
-            return ruleset, assigned_literals
+def solve_sudoku(puzzleid, puzzle, heuristic, restarts=None, budget=None):
 
-        # update the unit clauses
-        unit_clauses = [clause for clause in ruleset if len(clause) == 1]
+    '''Solve a puzzle given as a line of 81 characters, with the shared rule
+    base instead of a DIMACS file. Returns the same as solve_puzzle.'''
 
-    return ruleset, assigned_literals
+    global rule_base
 
+    if rule_base is None:
+        rule_base = RuleBase()
 
-def check_tautologies(ruleset):
+    metrics = Counter()
+    solution = rule_base.solve(puzzle_givens(puzzle), heuristic, metrics, restarts, budget)
 
-    '''Check for tautologies. If any, the clause may be removed.'''
+    return (puzzleid,) + metrics_row(metrics, heuristic, restarts) + (outcome(solution),)
 
-    ruleset = [clause for clause in ruleset if not has_tautology(clause)]
 
-    return ruleset
+def outcome(solution):
 
+    '''True if a solution was found, False if there is none, and None if the
+    budget ran out.'''
 
-def has_tautology(clause):
+    return None if solution is UNKNOWN else bool(solution)
 
-    '''Checks if a clause has a tautology: a literal and its negated form both occur.'''
 
-    for literal in clause:
-        if -literal in clause:
-            return True
-        else:
-            return False
+def metrics_row(metrics, heuristic, restarts=None):
 
+    '''The tried assignments and backtracks to log. For CDCL, decisions and
+    conflicts take their place. With restarts, the restarts and saved phases
+    are logged as well.'''
 
-def assign_new_literal_random(ruleset):
-
-    '''Randomly select a new literal to be assigned.'''
-
-    all_literals = list(chain.from_iterable(ruleset))
-
-    return random.choice(all_literals)
-
-
-def assign_new_literal_MOMs(ruleset):
-
-    '''Select a new literal to be assigned based on the MOMs heuristic.'''
-
-    # determine minimum clause size
-    minsize = min([len(clause) for clause in ruleset])
-
-    # selecting the clauses with minimum size
-    rules_selection = [clause for clause in ruleset if len(clause) == minsize]
-
-    literal_counts = Counter()
-
-    for clause in rules_selection:
-        for literal in clause:
-            literal_counts[literal] += 1
-
-    # select the literal with the highest occurrence count in the shortest clauses
-    selected_lit = max(literal_counts, key=lambda key: literal_counts[key])
-
-    return selected_lit
-
-
-def assign_new_literal_JW(ruleset):
-
-    '''Select a new literal to be assigned based on the Jeroslow-Wang 1-sided
-    heuristic.'''
-
-    literal_counts = Counter()
-
-    for clause in ruleset:
-        for literal in clause:
-
-            # the added value for a literal is weighted by the length of its clause
-            addition = 2 ** -len(clause)
-
-            literal_counts[literal] += addition
-
-    # getting the literal with the highest summed-up value
-    selected_lit = max(literal_counts, key=lambda key: literal_counts[key])
-
-    return selected_lit
-
-
-def assign_new_literal_JWTS(ruleset):
-
-    '''Select a new literal to be assigned based on the Jeroslow-Wang 2-sided
-    heuristic.'''
-
-    literal_counts = Counter()
-    abs_counts = Counter()
-
-    for clause in ruleset:
-        for literal in clause:
-
-            # the added value for a literal is weighted by the length of its clause
-            addition = 2 ** -len(clause)
-
-            abs_counts[abs(literal)] += addition
-            literal_counts[literal] += addition
-
-    # getting the literal with the highest summed-up value
-    lit = max(abs_counts, key=lambda key: abs_counts[key])
-
-    # now extract the polarity that has the heighest weight
-    selected_lit = lit if literal_counts[lit] > literal_counts[-lit] else -lit
-
-    return selected_lit
-
-
-def assign_new_literal_nishio(ruleset):
-
-    '''Returns the literal for which there are the fewest options left.
-    This is equivalent to the positive literal that has the fewest negative
-    constraints.'''
-
-    literal_counts = Counter()
-
-    for clause in ruleset:
-        for lit in clause:
-
-            # count only negative occurrences
-            if lit < 0:
-                literal_counts[lit] += 1
-
-    selected_lit = min(literal_counts, key=lambda key: literal_counts[key])
-
-    # return the negation of the selected literal, so the positive version!
-    return -selected_lit
-
-
-def read_DIMACS(filename):
-
-    '''Read in the DIMACS file format to list of lists.'''
-
-    DIMACS = []
-
-    with open('../dimacs_sudokus/' + filename) as file:
-        data = file.readlines()
-
-    for line in data:
-
-        if line[0].isdigit() or line[0] == '-':
+    if heuristic == "CDCL":
+        row = metrics['decisions'], metrics['conflicts']
+    else:
+        row = metrics['tried_assignments'], metrics['backtracks']
 
-            line = set(int(x) for x in line[:-2].split())
-            DIMACS.append(line)
+    if restarts is not None:
+        row += metrics['restarts'], metrics['saved_phases']
 
-    return DIMACS
+    return row
@@ -1,19 +1,30 @@
-import pandas as pd
+'''
+    Analysis of the results in results/: distributions, scatter plots and an
+    ANOVA of the heuristics. The plotting and statistics libraries are only
+    imported by the functions that use them, so the results can be loaded
+    without them.
+'''
+
 import os
+import sys
+
+import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-sns.set(font_scale=3)
-from scipy import stats
-from statsmodels.stats.multicomp import pairwise_tukeyhsd
-from statsmodels.stats.multicomp import MultiComparison
 import itertools
 
+from results import read_runs
+
+# the solver itself lives next to SAT.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from portfolio import PORTFOLIO
+
 def main():
 
     folder = '../results'
-    heuristics = ['nishio', 'JW', 'JWTS', 'random', 'MOM']
-    all_data, long_data = read_results(folder, long_format=True)
+    all_data, long_data = read_results(folder)
+
+    # the heuristics under the names the runner writes, as far as they were run
+    heuristics = [heuristic for heuristic in PORTFOLIO if heuristic + "-Difficulty" in all_data.columns]
 
     # Getting initial statistics
     mean = get_mean_grouped(all_data)
@@ -34,40 +45,38 @@ def main():
     ANOVA(all_data, long_data, "Difficulty")
 
 
-def read_results(folder, long_format=False):
-
-    '''Read in the results of the SAT experiment by concatenating dataframes.'''
+def read_results(folder):
 
+    '''Read in the results of the SAT experiment: all runs at once (see
+    results.py), with one column per heuristic and metric for the solved
+    puzzles. Runs with a restart policy count as a heuristic of their own,
+    as in JW-luby. A puzzle solved in several runs gets its mean.'''
 
-    # the empty dataframe
-    all_data = pd.DataFrame()
-    long_data = pd.DataFrame(columns=["Difficulty", "Heuristic"])
+    runs = read_runs(folder)
+    solved = runs[runs["Status"] == "SAT"].copy()
 
-    for filename in os.scandir(folder):
+    restarts = solved["Config"].str.extract(r'restarts=(\w+)', expand=False)
+    solved["Heuristic"] = solved["Heuristic"].where(restarts.isna(), solved["Heuristic"] + "-" + restarts)
+    solved["Difficulty"] = solved["TriedAssignments"] + solved["Backtracks"]
 
-        # the heuristic is not in the file yet, so extract it from filename
-        heuristic = filename.name.split('_')[1]
+    metrics = ["TriedAssignments", "Backtracks", "Restarts", "SavedPhases", "Difficulty"]
+    all_data = solved.pivot_table(index="PuzzleID", columns="Heuristic", values=metrics, aggfunc="mean")
+    all_data.columns = [heuristic + "-" + metric for metric, heuristic in all_data.columns]
 
-        colnames = ["PuzzleID", heuristic + "-TriedAssignments", heuristic + "-Backtracks"]
+    long_data = solved.set_index("PuzzleID")[["Difficulty", "Heuristic"]]
 
-        df = pd.read_csv(filename, header=None, names=colnames).set_index('PuzzleID')
+    return all_data, long_data
 
-        df[heuristic + "-Difficulty"] = df[heuristic + "-TriedAssignments"] + df[heuristic + "-Backtracks"]
 
-        #df[heuristic + "-DifficultyRank"] = df[heuristic + "-Difficulty"].rank()
+def plotting():
 
-        if all_data.empty:
-            all_data = df
-        else:
-            all_data = all_data.join(df)
+    '''matplotlib and seaborn, imported when they are first needed.'''
 
-        if long_format:
-            new_df = pd.DataFrame()
-            new_df["Difficulty"] = df[heuristic + "-Difficulty"]
-            new_df["Heuristic"] = heuristic
-            long_data = pd.concat([long_data, new_df])
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set(font_scale=3)
 
-    return all_data, long_data
+    return plt, sns
 
 
 def get_mean_grouped(df, ignore_zeros=True):
@@ -75,7 +84,7 @@ def get_mean_grouped(df, ignore_zeros=True):
     '''Extracting the mean from a dataframe'''
 
     if ignore_zeros:
-        df = df.replace(0, np.NaN)
+        df = df.replace(0, np.nan)
 
     return df.mean()
 
@@ -84,6 +93,8 @@ def distplot_groups(df, var_viz, groups, xlab=None, ylab=None, title=None):
 
     '''Drawing the groupwise distribution of a variable within a dataframe.'''
 
+    plt, sns = plotting()
+
     for var in groups:
 
         dffilter = df.filter(regex=var).filter(regex=var_viz)
@@ -104,7 +115,8 @@ def distplot_groups(df, var_viz, groups, xlab=None, ylab=None, title=None):
 
 def scatter_groups(df, scatter_var, xaxis, yaxis, title=None, color=None):
 
-    df = df.replace(0, np.NaN)
+    plt, sns = plotting()
+    df = df.replace(0, np.nan)
     xvar = xaxis + "-" + scatter_var
     yvar = yaxis + "-" + scatter_var
 
@@ -127,6 +139,7 @@ def scatter_groups(df, scatter_var, xaxis, yaxis, title=None, color=None):
 
 def scatter_all_groups(df, scatter_var, groups, title=None):
 
+    plt, sns = plotting()
     current_palette = sns.color_palette()
 
     combs = itertools.combinations(groups, 2)
@@ -140,6 +153,9 @@ def ANOVA(df, longdata, metric, pthreshold=0.05):
     between groups as well as the nature of this difference (which heuristic is
     significantly better than the others?)'''
 
+    from scipy import stats
+    from statsmodels.stats.multicomp import MultiComparison
+
     # remove rows with difficulty score 0: heuristics have no effect
     df = df[df["nishio-" + metric] > 0]
 
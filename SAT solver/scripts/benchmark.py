@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+
+'''
+    Benchmark of solver configurations on fixed samples of the puzzle collections.
+
+    Usage: python benchmark.py config [config ...] [--size N] [--seed S]
+                               [--timeout T] [--save FILE] [--baseline FILE]
+
+    A configuration is a heuristic, optionally followed by options separated
+    by colons: a restart policy (luby, geometric, glucose), 'numpy' for the
+    NumPy scores backend, 'amo' for native at-most-one constraints, and
+    'incremental' to solve all puzzles of a collection with one solver
+    instead of a new one per puzzle. For example: CDCL, JW:luby, nishio:numpy
+    or CDCL:amo:incremental.
+
+    From each collection, the same --size puzzles are drawn for a given --seed,
+    and the random heuristic is seeded per puzzle, so runs can be compared.
+    Every configuration runs in a fresh process, so that its peak memory use
+    (RSS) can be measured. Per collection, the wall time, decisions and
+    propagations per second and the PAR-2 score are reported: the mean time
+    per puzzle, where a puzzle that is not solved within --timeout seconds
+    counts as twice the timeout.
+
+    With --save, the results are written to a JSON file. With --baseline, they
+    are compared to such a file, and the exit status is 1 if any configuration
+    got slower by more than --tolerance (10% by default).
+'''
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# the solver itself lives next to SAT.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from budget import Budget
+from restarts import RESTART_POLICIES
+from rulebase import RuleBase, puzzle_givens
+from solver import Solver
+
+SUDOKUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sudokus')
+
+COLLECTIONS = ["top95.sdk.txt", "damnhard.sdk.txt", "top2365.sdk.txt", "1000 sudokus.txt"]
+
+
+def parse_configuration(configuration):
+
+    '''Split a configuration like JW:luby:numpy into the heuristic and the
+    keyword arguments of the solver, and whether it is incremental.'''
+
+    heuristic, *options = configuration.split(':')
+    settings = {'restarts': None, 'backend': None, 'cardinality': False}
+    incremental = False
+
+    for option in options:
+
+        if option in RESTART_POLICIES:
+            settings['restarts'] = option
+        elif option == 'numpy':
+            settings['backend'] = option
+        elif option == 'amo':
+            settings['cardinality'] = True
+        elif option == 'incremental':
+            incremental = True
+        else:
+            raise ValueError('unknown option %r in configuration %r' % (option, configuration))
+
+    return heuristic, settings, incremental
+
+
+def sample_puzzles(collection, size, seed):
+
+    '''The same puzzles from a collection for the same size and seed.'''
+
+    with open(os.path.join(SUDOKUS, collection)) as file:
+        puzzles = [line.strip() for line in file if line.strip()]
+
+    rng = random.Random('%s-%d' % (collection, seed))
+    indices = sorted(rng.sample(range(len(puzzles)), min(size, len(puzzles))))
+
+    return [(index, puzzles[index]) for index in indices]
+
+
+def run_configuration(configuration, samples, seed, timeout):
+
+    '''Solve the samples of every collection with one configuration. Runs in a
+    process of its own; returns the results per collection and the peak RSS.'''
+
+    heuristic, settings, incremental = parse_configuration(configuration)
+    rules = RuleBase().ruleset
+
+    # a search that runs out of time stops with an unknown outcome
+    budget = Budget(seconds=timeout)
+    results = {}
+
+    for collection, puzzles in samples.items():
+
+        solver = Solver(rules, heuristic, **settings) if incremental else None
+        totals = Counter()
+        times = []
+
+        for index, puzzle in puzzles:
+
+            random.seed('%d-%s-%d' % (seed, collection, index))
+            metrics = Counter()
+            start = time.perf_counter()
+
+            # the time of a new solver counts, unless it is shared
+            if not incremental:
+                solver = Solver(rules, heuristic, **settings)
+
+            solved = solver.solve(puzzle_givens(puzzle), metrics, budget)
+
+            elapsed = time.perf_counter() - start
+            times.append(elapsed if solved else None)
+
+            totals['decisions'] += metrics['decisions']
+            totals['propagations'] += metrics['propagations']
+            totals['solved'] += bool(solved)
+            totals['wall_time'] += elapsed
+
+        results[collection] = summarize(totals, times, timeout)
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {'collections': results, 'peak_rss_kb': peak_rss}
+
+
+def summarize(totals, times, timeout):
+
+    '''The statistics of one collection: solved count, wall time, rates and PAR-2.'''
+
+    wall_time = totals['wall_time']
+    par2 = sum(2 * timeout if elapsed is None else elapsed for elapsed in times) / max(len(times), 1)
+
+    return {
+        'puzzles': len(times),
+        'solved': totals['solved'],
+        'wall_time': wall_time,
+        'decisions': totals['decisions'],
+        'propagations': totals['propagations'],
+        'decisions_per_second': totals['decisions'] / wall_time if wall_time else 0.0,
+        'propagations_per_second': totals['propagations'] / wall_time if wall_time else 0.0,
+        'par2': par2,
+    }
+
+
+def run_benchmark(configurations, size=20, seed=0, timeout=10.0, collections=COLLECTIONS):
+
+    '''Run every configuration, one after the other, each in a fresh process.'''
+
+    samples = dict((collection, sample_puzzles(collection, size, seed)) for collection in collections)
+    results = {}
+
+    for configuration in configurations:
+
+        # checked here, so that a typo does not surface in a worker
+        parse_configuration(configuration)
+
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            results[configuration] = executor.submit(run_configuration, configuration, samples,
+                                                     seed, timeout).result()
+
+    settings = {'size': size, 'seed': seed, 'timeout': timeout, 'collections': list(collections)}
+
+    return {'settings': settings, 'results': results}
+
+
+def print_report(benchmark):
+
+    row = '{:<24} {:<18} {:>7} {:>9} {:>12} {:>12} {:>9}'
+
+    print(row.format('configuration', 'collection', 'solved', 'time (s)', 'decisions/s',
+                     'props/s', 'PAR-2'))
+
+    for configuration, result in benchmark['results'].items():
+        for collection, stats in result['collections'].items():
+            print(row.format(configuration, collection[:18],
+                             '%d/%d' % (stats['solved'], stats['puzzles']),
+                             '%.2f' % stats['wall_time'],
+                             '%.0f' % stats['decisions_per_second'],
+                             '%.0f' % stats['propagations_per_second'],
+                             '%.3f' % stats['par2']))
+
+        print('{:<24} peak RSS {:.1f} MB'.format(configuration, result['peak_rss_kb'] / 1024))
+
+
+def compare(benchmark, baseline, tolerance=0.1):
+
+    '''Compare the PAR-2 scores and wall times against a baseline. Returns the
+    regressions as (configuration, collection, measure, baseline, current).'''
+
+    if benchmark['settings'] != baseline['settings']:
+        print('Warning: the baseline was run with other settings: %s' % baseline['settings'])
+
+    regressions = []
+
+    for configuration, result in benchmark['results'].items():
+
+        if configuration not in baseline['results']:
+            continue
+
+        before = baseline['results'][configuration]['collections']
+
+        for collection, stats in result['collections'].items():
+
+            if collection not in before:
+                continue
+
+            for measure in ('par2', 'wall_time'):
+
+                old, new = before[collection][measure], stats[measure]
+                change = (new - old) / old if old else 0.0
+
+                print('{:<24} {:<18} {:<9} {:>9.3f} -> {:>9.3f} ({:+.0%})'.format(
+                    configuration, collection[:18], measure, old, new, change))
+
+                if change > tolerance:
+                    regressions.append((configuration, collection, measure, old, new))
+
+    return regressions
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmark solver configurations on the sudoku collections.')
+    parser.add_argument('configurations', nargs='+',
+                        help='configurations such as CDCL, JW:luby or nishio:numpy:incremental')
+    parser.add_argument('--size', type=int, default=20, help='number of puzzles per collection')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the samples and the random heuristic')
+    parser.add_argument('--timeout', type=float, default=10.0, help='seconds per puzzle')
+    parser.add_argument('--save', default=None, help='write the results to this JSON file')
+    parser.add_argument('--baseline', default=None, help='compare with the results in this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='relative slowdown that counts as a regression')
+    args = parser.parse_args()
+
+    benchmark = run_benchmark(args.configurations, args.size, args.seed, args.timeout)
+    print_report(benchmark)
+
+    regressions = []
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(benchmark, json.load(file), args.tolerance)
+
+        for configuration, collection, measure, old, new in regressions:
+            print('Regression: %s on %s, %s %.3f -> %.3f' % (configuration, collection, measure, old, new))
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(benchmark, file, indent=2)
+
+    sys.exit(1 if regressions else 0)
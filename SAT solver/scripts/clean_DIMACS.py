@@ -1,38 +1,46 @@
 import os
+import sys
 
-def read_puzzles(folder, dim=9):
+# the sudoku encoding lives next to SAT.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from grid import grid_size, puzzle_givens, sudoku_rules
+
+def read_puzzles(folder):
 
     '''Reads in sudoku puzzles from specified folder and returns them as DIMACS
-    files, concatenated with general sudoku rules.'''
+    files, concatenated with general sudoku rules. A 9 x 9 puzzle gets the
+    rules in sudoku-rules.txt, larger ones rules of their size (see grid.py).'''
 
     puzzle_ctr = 0
 
-    ruleset = read_DIMACS('sudoku-rules.txt')
+    # the rules per size of sudoku
+    rulesets = {9: read_DIMACS('sudoku-rules.txt')}
 
     for filename in os.scandir(folder):
 
+        # one line at a time, however large the file
         with open(filename) as file:
-            puzzles = file.readlines()
 
-        for puzzle in puzzles:
+            for puzzle in file:
+
+                puzzle = puzzle.strip()
 
-            position=0
+                if not puzzle:
+                    continue
 
-            with open('dimacs_sudokus/sudoku_nr_' + str(puzzle_ctr) + '.txt', 'w') as dimacs_file:
+                dim = grid_size(puzzle)
 
-                for rule in ruleset:
-                    dimacs_file.write(rule)
+                if dim not in rulesets:
+                    rulesets[dim] = [' '.join(map(str, clause)) + ' 0\n' for clause in sudoku_rules(dim)]
 
-                for vertical in range(1, 1+dim):
-                    for horizontal in range(1, 1+dim):
+                with open('dimacs_sudokus/sudoku_nr_' + str(puzzle_ctr) + '.txt', 'w') as dimacs_file:
 
-                        if puzzle[position].isdigit():
-                            index = str(vertical) + str(horizontal) + str(puzzle[position])
-                            dimacs_file.write(index + ' 0\n')
+                    dimacs_file.writelines(rulesets[dim])
 
-                        position+=1
+                    for literal in puzzle_givens(puzzle, dim):
+                        dimacs_file.write(str(literal) + ' 0\n')
 
-            puzzle_ctr+=1
+                puzzle_ctr+=1
 
 def read_DIMACS(filename):
 
@@ -41,11 +49,9 @@ def read_DIMACS(filename):
     DIMACS = []
 
     with open(filename) as file:
-        data = file.readlines()
-
-    for line in data:
-        if line[0].isdigit() or line[0] == '-':
-            DIMACS.append(line)
+        for line in file:
+            if line[0].isdigit() or line[0] == '-':
+                DIMACS.append(line)
 
     return DIMACS
 
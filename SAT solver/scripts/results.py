@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+'''
+    Columnar storage of the results of runner.py.
+
+    The rows of a run are buffered in memory, column by column, and written
+    to one file when the run is closed: Parquet if pyarrow is installed, and
+    otherwise a NumPy .npz archive with one array per column. Besides the
+    puzzle and its metrics, every row records the heuristic, the seed and the
+    configuration of the run, so the files of many runs can be read back as
+    one table with read_runs.
+
+    The results/log_*.csv files of earlier runs, one per heuristic, are read
+    along with them.
+'''
+
+import os
+
+import numpy as np
+
+# the columns of a run, with the type of their values
+COLUMNS = [("PuzzleID", str), ("Heuristic", str), ("Config", str), ("Seed", int), ("Status", str),
+           ("TriedAssignments", int), ("Backtracks", int), ("Restarts", int), ("SavedPhases", int)]
+
+# the outcome of a search, in the Status column
+STATUS = {True: "SAT", False: "UNSAT", None: "UNKNOWN"}
+
+# heuristics that the CSV logs of earlier runs name differently
+LOG_NAMES = {"MOM": "MOMS"}
+
+
+def have_pyarrow():
+
+    try:
+        import pyarrow
+    except ImportError:
+        return False
+
+    return True
+
+
+class ResultsWriter(object):
+
+    '''Collects the rows of one run and writes them as one columnar file.
+    The format is 'parquet', 'feather' or 'npz'; by default Parquet, or .npz
+    without pyarrow. The extension is added to the filename.'''
+
+    def __init__(self, filename, format=None):
+
+        if format is None:
+            format = 'parquet' if have_pyarrow() else 'npz'
+
+        if format not in ('parquet', 'feather', 'npz'):
+            raise ValueError('unknown results format %r' % format)
+
+        self.filename = filename + '.' + format
+        self.format = format
+        self.columns = dict((name, []) for name, kind in COLUMNS)
+
+    def write(self, row):
+
+        '''Add a row, with a value for every column in COLUMNS.'''
+
+        for (name, kind), value in zip(COLUMNS, row):
+            self.columns[name].append(kind(value))
+
+    def __len__(self):
+
+        return len(self.columns["PuzzleID"])
+
+    def arrays(self):
+
+        return dict((name, np.array(self.columns[name], dtype=str if kind is str else np.int64))
+                    for name, kind in COLUMNS)
+
+    def close(self):
+
+        '''Write the rows collected so far, if there are any.'''
+
+        if not len(self):
+            return
+
+        if self.format == 'npz':
+            np.savez_compressed(self.filename, **self.arrays())
+            return
+
+        import pyarrow
+
+        table = pyarrow.table(self.columns)
+
+        if self.format == 'parquet':
+            import pyarrow.parquet
+            pyarrow.parquet.write_table(table, self.filename)
+        else:
+            import pyarrow.feather
+            pyarrow.feather.write_feather(table, self.filename)
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        self.close()
+
+
+def read_runs(folder):
+
+    '''All results in a folder as one pandas DataFrame with the COLUMNS: the
+    run files of every format, each format read in one go, and the CSV logs
+    of earlier runs, which only hold solved puzzles.'''
+
+    import pandas as pd
+
+    paths = dict((extension, []) for extension in ('.parquet', '.feather', '.npz', '.csv'))
+
+    for entry in sorted(os.scandir(folder), key=lambda entry: entry.name):
+
+        extension = os.path.splitext(entry.name)[1]
+
+        # the CSV logs are named log_<heuristic>_<time>.csv
+        if extension == '.csv' and not entry.name.startswith('log_'):
+            continue
+
+        if extension in paths:
+            paths[extension].append(entry.path)
+
+    frames = []
+
+    if paths['.parquet'] or paths['.feather']:
+        import pyarrow.dataset
+
+        for extension, format in (('.parquet', 'parquet'), ('.feather', 'feather')):
+            if paths[extension]:
+                frames.append(pyarrow.dataset.dataset(paths[extension], format=format).to_table().to_pandas())
+
+    if paths['.npz']:
+        archives = [np.load(path) for path in paths['.npz']]
+        frames.append(pd.DataFrame(dict((name, np.concatenate([archive[name] for archive in archives]))
+                                        for name, kind in COLUMNS)))
+
+    if paths['.csv']:
+        frames.append(read_logs(paths['.csv']))
+
+    if not frames:
+        return pd.DataFrame(dict((name, []) for name, kind in COLUMNS))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_logs(paths):
+
+    '''The CSV logs of earlier runs as one DataFrame with the COLUMNS. The
+    heuristic, and the restart policy if any, are taken from the filename.'''
+
+    import pandas as pd
+
+    frames = []
+
+    for path in paths:
+
+        heuristic, _, restarts = os.path.basename(path).split('_')[1].partition('-')
+        heuristic = LOG_NAMES.get(heuristic, heuristic)
+
+        # runs with restarts have two more columns
+        df = pd.read_csv(path, header=None, dtype={0: str})
+        df.columns = ["PuzzleID", "TriedAssignments", "Backtracks", "Restarts", "SavedPhases"][:len(df.columns)]
+
+        df["Heuristic"] = heuristic
+        df["Config"] = 'restarts=' + restarts if restarts else ''
+        df["Seed"] = 0
+        df["Status"] = STATUS[True]
+        frames.append(df)
+
+    df = pd.concat(frames, ignore_index=True)
+
+    for name in ("Restarts", "SavedPhases"):
+        df[name] = df[name].fillna(0).astype(np.int64) if name in df else 0
+
+    return df[[name for name, kind in COLUMNS]]
@@ -2,14 +2,49 @@
 
 '''
     Runner for SAT_for_analysis.py.
+
+    Usage: python runner.py [heuristic ...] [--workers N] [--chunksize K]
+
+    Every heuristic is run on every puzzle in random_sample.txt. The puzzles
+    are spread over a pool of worker processes; the results are collected in
+    this process, and written at the end of the run as one columnar file,
+    results/run_*.parquet (or .npz without pyarrow, see results.py). Every row
+    holds the puzzle, heuristic, configuration, seed, outcome and metrics.
+    With --workers 1 everything runs in this process, one puzzle at a time.
+
+    The random heuristic is seeded per puzzle from --seed, so a run can be
+    repeated. Without --seed, a seed is drawn, and recorded with the results.
+
+    With --sudokus ../sudokus, the puzzles are taken straight from the puzzle
+    collections instead of from the DIMACS files made by clean_DIMACS.py. Every
+    worker then loads the sudoku rules once and solves each puzzle by assuming
+    its givens, so the dimacs_sudokus folder is not needed.
+
+    With --restarts luby (or geometric, or glucose), the search restarts with
+    that schedule and saves phases, and the restarts and the decisions that
+    took a saved phase are filled in.
+
+    With --time (seconds), --max-decisions, --max-conflicts or --max-memory
+    (the current resident megabytes of the worker), every search is stopped
+    once it reaches that limit. Such a puzzle gets the status UNKNOWN, so one
+    hard puzzle cannot stall the whole batch.
 '''
 
 
-import SAT_for_analysis
+import argparse
+import sys
 import random
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+# the solver itself lives next to SAT.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import SAT_for_analysis
+from budget import Budget
+from results import STATUS, ResultsWriter
+from rulebase import iter_puzzle_collection
+
 #folder = "dimacs_sudokus"
 folder = "../dimacs_sudokus"
 
@@ -27,18 +62,147 @@ def select_random_puzzles(folder, puzzle_count = 3000):
 def read_random_sample(filename):
 
     with open(filename) as file:
-        sample = file.readlines()
-
-    puzzles = [puzzle.rstrip() for puzzle in sample]
+        puzzles = [puzzle.rstrip() for puzzle in file]
 
     return puzzles
 
+def read_sudoku_sample(filename, folder):
+
+    '''Look up the puzzles of a sample in the collections they were numbered
+    from by clean_DIMACS.py. Returns (name, puzzle) pairs.'''
+
+    names = read_random_sample(filename)
+    numbers = [int(''.join(i for i in name if i.isdigit())) for name in names]
+
+    # only the sampled puzzles are kept, not the whole collection
+    wanted = set(numbers)
+    found = dict((number, puzzle) for number, puzzle in enumerate(iter_puzzle_collection(folder))
+                 if number in wanted)
+
+    return [(name, found[number]) for name, number in zip(names, numbers)]
+
+def solve_task(task):
+
+    '''Solve one (heuristic, puzzle, restart policy, budget, seed) task; runs
+    in a worker process. A puzzle is either the name of a DIMACS file or a
+    (name, puzzle line) pair.'''
+
+    heuristic, puzzle, restarts, budget, seed = task
+
+    # the same for every worker, so the random heuristic can be repeated
+    random.seed('%d-%s' % (seed, puzzle[0] if isinstance(puzzle, tuple) else puzzle))
+
+    if isinstance(puzzle, tuple):
+        name, line = puzzle
+        puzzleid = ''.join(i for i in name if i.isdigit())
+        return heuristic, SAT_for_analysis.solve_sudoku(puzzleid, line, heuristic, restarts, budget)
+
+    return heuristic, SAT_for_analysis.solve_puzzle(puzzle, heuristic, restarts, budget)
+
+def run_config(restarts=None, budget=None):
+
+    '''The settings of a run besides the heuristic, as in restarts=luby;time=10.'''
+
+    settings = [('restarts', restarts)]
+
+    if budget is not None:
+        settings += [('time', budget.seconds), ('max-decisions', budget.decisions),
+                     ('max-conflicts', budget.conflicts), ('max-memory', budget.memory)]
+
+    return ';'.join('%s=%s' % (name, value) for name, value in settings if value is not None)
+
+def run_batch(puzzles, heuristics, timestamp, workers=None, chunksize=16, restarts=None, budget=None,
+              seed=0, format=None):
+
+    '''Solve every puzzle with every heuristic, and write the results of the
+    run to one file once it is done (or interrupted). Returns the number of
+    solved puzzles.'''
+
+    tasks = [(heuristic, puzzle, restarts, budget, seed) for heuristic in heuristics for puzzle in puzzles]
+
+    # the rows are buffered here, the only process writing them
+    writer = ResultsWriter('../results/run_' + timestamp, format)
+    config = run_config(restarts, budget)
+
+    solved_count = 0
+
+    try:
+        if workers == 1:
+            results = map(solve_task, tasks)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            results = executor.map(solve_task, tasks, chunksize=chunksize)
+
+        for i, (heuristic, result) in enumerate(results):
+
+            print("Puzzle " + str(i % len(puzzles)) + " (" + heuristic + ")")
+
+            # the puzzle id and metrics, and whether it was solved; without
+            # restarts, there are no restarts or saved phases to log
+            puzzleid, metrics, solved = result[0], result[1:-1], result[-1]
+            metrics += (0,) * (4 - len(metrics))
+
+            writer.write((puzzleid, heuristic, config, seed, STATUS[solved]) + metrics)
+
+            if solved:
+                solved_count += 1
+            elif solved is None:
+                print('Unknown: the budget ran out.')
+            else:
+                print('This problem is unsatisfiable.')
+
+        if executor is not None:
+            executor.shutdown()
+
+    finally:
+        writer.close()
+
+    return solved_count
+
 if __name__ == '__main__':
 
-    timestamp = datetime.now().strftime("%H-%M-%d-%m")
+    parser = argparse.ArgumentParser(description='Run SAT_for_analysis.py on a sample of puzzles.')
+    parser.add_argument('heuristics', nargs='+',
+                        help='heuristics to run: MOMS, JW, JWTS, nishio, random, CDCL or VSIDS')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes (default: one per CPU, 1 runs serially)')
+    parser.add_argument('--chunksize', type=int, default=16,
+                        help='number of puzzles handed to a worker at once')
+    parser.add_argument('--restarts', default=None, choices=['luby', 'geometric', 'glucose'],
+                        help='restart policy, with phase saving')
+    parser.add_argument('--sample', default='random_sample.txt',
+                        help='file listing the puzzles in ' + folder)
+    parser.add_argument('--sudokus', default=None,
+                        help='folder with the puzzle collections to take the sample from, '
+                             'instead of the DIMACS files')
+    parser.add_argument('--time', type=float, default=None,
+                        help='seconds per search before its outcome is unknown')
+    parser.add_argument('--max-decisions', type=int, default=None,
+                        help='decisions per search before its outcome is unknown')
+    parser.add_argument('--max-conflicts', type=int, default=None,
+                        help='conflicts per search before its outcome is unknown')
+    parser.add_argument('--max-memory', type=float, default=None,
+                        help='resident megabytes of the worker, checked during a search, '
+                             'before its outcome is unknown')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for the random heuristic (default: drawn, and logged)')
+    parser.add_argument('--format', default=None, choices=['parquet', 'feather', 'npz'],
+                        help='file format of the results (default: parquet, or npz without pyarrow)')
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 31)
+
+    limits = (args.time, args.max_decisions, args.max_conflicts, args.max_memory)
+    budget = Budget(*limits) if any(limit is not None for limit in limits) else None
+
+    timestamp = datetime.now().strftime("%H-%M-%S-%d-%m")
     #puzzles = select_random_puzzles(folder)
-    puzzles = read_random_sample('random_sample.txt')
 
-    for i, puzzle in enumerate(puzzles):
-        print("Puzzle " + str(i))
-        SAT_for_analysis.start_DPLL(timestamp, puzzle)
+    if args.sudokus:
+        puzzles = read_sudoku_sample(args.sample, args.sudokus)
+    else:
+        puzzles = read_random_sample(args.sample)
+
+    run_batch(puzzles, args.heuristics, timestamp, args.workers, args.chunksize, args.restarts, budget,
+              seed, args.format)
@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+'''
+    A long-lived solver service, so that a puzzle does not have to pay for
+    starting Python, importing the solver and parsing the sudoku rules again.
+
+    Usage: python server.py [--socket PATH] [--workers N] [--amo] [--cache N]
+           python server.py --connect PATH
+
+    Without --socket, requests are read from stdin and answered on stdout.
+    With it, the server listens on a Unix socket, and any number of clients
+    may connect at once; --connect sends the lines of stdin to such a server
+    and prints its answers. Every request is one line of JSON, such as
+
+        {"id": 1, "sudoku": "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......"}
+        {"id": 2, "cnf": "sudoku_nr_14803.txt", "heuristic": "JW", "time": 10}
+        {"id": 3, "dimacs": "p cnf 2 2\\n1 2 0\\n-1 0\\n"}
+
+    with a sudoku string (of any size, see grid.py), the path of a DIMACS file
+    or DIMACS text. Optional fields are the heuristic (CDCL by default, or
+    portfolio for DIMACS), restarts, "amo": true, "backend" ("numpy", or
+    "bitmask" for sudokus) and the limits time, decisions, conflicts and
+    memory (see budget.py). The answer is one line of JSON with the same id,
+    a status (SAT, UNSAT, UNKNOWN or ERROR), the solution string of a sudoku
+    or the model of a DIMACS problem, the seconds the search took, or an
+    error message.
+
+    The requests are solved on a pool of worker processes. Every worker parses
+    and preprocesses the sudoku rules once, when it starts, and keeps a solver
+    per heuristic (see rulebase.py), and a cache of the sudoku solutions it
+    found, which also answers puzzles that are equivalent to an earlier one
+    (see cache.py; --cache sets its size, 0 turns it off). Answers are written as soon as they are
+    ready, so they may come in another order than the requests; the id tells
+    them apart. A request without an id gets its line number.
+'''
+
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bitmask import solve_grid
+from budget import UNKNOWN, Budget
+from cache import CAPACITY, SolutionCache
+from dimacs import DIMACSParser, parse_DIMACS
+from grid import grid_size, solution_string
+from portfolio import solve, solve_portfolio
+from preprocess import preprocess, reconstruct_model
+from rulebase import puzzle_givens, shared_rule_base
+
+# the limits a request may set, and the keyword of Budget for each
+LIMITS = {'time': 'seconds', 'decisions': 'decisions', 'conflicts': 'conflicts', 'memory': 'memory'}
+
+# the solutions of the sudokus a worker process has solved, if it keeps them
+CACHE = None
+
+
+def warm_up(cardinality, cache_size=CAPACITY):
+
+    '''Start a worker with its rule base ready, and an empty cache.'''
+
+    global CACHE
+
+    shared_rule_base(cardinality)
+
+    if cache_size:
+        CACHE = SolutionCache(cache_size)
+
+
+def handle_request(request):
+
+    '''Solve one request in a worker. Returns the answer as a dictionary.'''
+
+    answer = {'id': request.get('id')}
+    start = time.perf_counter()
+
+    try:
+        heuristic = request.get('heuristic', 'CDCL')
+        limits = dict((LIMITS[name], value) for name, value in request.items() if name in LIMITS)
+        budget = Budget(**limits) if limits else None
+
+        if 'sudoku' in request:
+            solution = solve_sudoku_request(request, heuristic, budget)
+            key = 'solution'
+        else:
+            solution = solve_dimacs_request(request, heuristic, budget)
+            key = 'model'
+
+        if solution is UNKNOWN:
+            answer['status'] = 'UNKNOWN'
+        elif solution is False:
+            answer['status'] = 'UNSAT'
+        else:
+            answer['status'] = 'SAT'
+            answer[key] = solution
+
+    except Exception as error:
+        answer['status'] = 'ERROR'
+        answer['error'] = str(error) or repr(error)
+
+    answer['seconds'] = time.perf_counter() - start
+
+    return answer
+
+
+def solve_sudoku_request(request, heuristic, budget):
+
+    '''The solution string of a sudoku request, False if it has none, or
+    UNKNOWN.'''
+
+    puzzle = request['sudoku'].strip()
+
+    if heuristic == 'portfolio':
+        raise ValueError('the portfolio is only raced on DIMACS problems')
+
+    # an answer that the budget cut short is not cached
+    if CACHE is None:
+        return search_sudoku(puzzle, request, heuristic, budget)
+
+    solution = CACHE.get(puzzle)
+
+    if solution is not None:
+        return solution or False
+
+    solution = search_sudoku(puzzle, request, heuristic, budget)
+
+    if solution is not UNKNOWN:
+        CACHE.put(puzzle, solution or None)
+
+    return solution
+
+
+def search_sudoku(puzzle, request, heuristic, budget):
+
+    '''Search for the solution of a sudoku request.'''
+
+    size = grid_size(puzzle)
+
+    if size != 9 or request.get('backend') == 'bitmask':
+
+        # the bitmask backend only tells unknown apart through the budget
+        solution = solve_grid(puzzle, heuristic, budget=budget)
+
+        if solution is None:
+            return UNKNOWN if budget is not None and budget.exhausted else False
+
+        return solution
+
+    solution = shared_rule_base(bool(request.get('amo'))).solve(puzzle_givens(puzzle), heuristic,
+                                                                restarts=request.get('restarts'), budget=budget)
+
+    if solution is UNKNOWN:
+        return UNKNOWN
+
+    return solution_string(solution) if solution else False
+
+
+def solve_dimacs_request(request, heuristic, budget):
+
+    '''The model of a DIMACS request, given as a path or as text, False if it
+    is unsatisfiable, or UNKNOWN.'''
+
+    if 'cnf' in request:
+        ruleset, variables = parse_DIMACS(request['cnf'])
+
+    elif 'dimacs' in request:
+        parser = DIMACSParser()
+        parser.feed(request['dimacs'].encode())
+        ruleset, variables = parser.finish()
+
+    else:
+        raise ValueError('a request needs a sudoku, cnf or dimacs field')
+
+    ruleset, eliminated = preprocess(ruleset)
+    cardinality = bool(request.get('amo'))
+
+    if heuristic == 'portfolio':
+        winner, solution = solve_portfolio(ruleset, restarts=request.get('restarts'), budget=budget,
+                                           cardinality=cardinality)
+    else:
+        solution = solve(ruleset, heuristic, restarts=request.get('restarts'),
+                         backend=request.get('backend'), budget=budget, cardinality=cardinality)
+
+    if solution is UNKNOWN:
+        return UNKNOWN
+
+    # an empty ruleset is satisfied without assigning anything
+    if not solution and ruleset:
+        return False
+
+    return reconstruct_model(solution, eliminated)
+
+
+def serve_lines(lines, write, pool):
+
+    '''Read requests from an iterable of lines and submit them to the pool,
+    writing every answer as a line with write() once it is ready. Returns
+    when all of them have been answered.'''
+
+    lock = threading.Lock()
+
+    # released once the answer of a submitted request has been written
+    written = threading.Semaphore(0)
+    submitted = 0
+
+    def answer(reply):
+
+        with lock:
+            write(json.dumps(reply) + '\n')
+
+    def answered(future, request):
+
+        try:
+            answer(result_of(future, request))
+        finally:
+            written.release()
+
+    for number, line in enumerate(lines, 1):
+
+        if not line.strip():
+            continue
+
+        try:
+            request = json.loads(line)
+
+            if not isinstance(request, dict):
+                raise ValueError('a request must be a JSON object')
+
+        except ValueError as error:
+            answer({'id': number, 'status': 'ERROR', 'error': 'invalid request: %s' % error})
+            continue
+
+        request.setdefault('id', number)
+
+        future = pool.submit(handle_request, request)
+        future.add_done_callback(lambda future, request=request: answered(future, request))
+        submitted += 1
+
+    for _ in range(submitted):
+        written.acquire()
+
+
+def result_of(future, request):
+
+    '''The answer of a finished request, also when its worker died.'''
+
+    error = future.exception()
+
+    if error is None:
+        return future.result()
+
+    return {'id': request['id'], 'status': 'ERROR', 'error': str(error) or repr(error)}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+
+    '''Serves the requests of one client connection, each on the shared pool.'''
+
+    def handle(self):
+
+        lines = (line.decode() for line in self.rfile)
+
+        def write(text):
+            self.wfile.write(text.encode())
+            self.wfile.flush()
+
+        try:
+            serve_lines(lines, write, self.server.pool)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class SolverServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    daemon_threads = True
+
+    def __init__(self, path, pool):
+
+        self.pool = pool
+
+        # a socket file left behind by an earlier server is replaced
+        if os.path.exists(path):
+            os.unlink(path)
+
+        socketserver.UnixStreamServer.__init__(self, path, RequestHandler)
+
+
+def serve(path=None, workers=None, cardinality=False, cache_size=CAPACITY):
+
+    '''Serve requests on stdin and stdout, or on a Unix socket, until stdin
+    ends or the server is interrupted.'''
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_up,
+                             initargs=(cardinality, cache_size)) as pool:
+
+        if path is None:
+
+            def write(text):
+                sys.stdout.write(text)
+                sys.stdout.flush()
+
+            serve_lines(sys.stdin, write, pool)
+            return
+
+        server = SolverServer(path, pool)
+
+        # stopping the server, as a service manager does, closes the socket
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            os.unlink(path)
+
+
+def connect(path, lines, output=sys.stdout):
+
+    '''Send request lines to a server on a Unix socket, and write its answers
+    to output as they come in.'''
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+
+        client.connect(path)
+
+        # the requests are sent from a thread, so that answers are read while
+        # later requests are still being sent
+        def send():
+            for line in lines:
+                client.sendall(line.encode() if line.endswith('\n') else (line + '\n').encode())
+
+            client.shutdown(socket.SHUT_WR)
+
+        sender = threading.Thread(target=send, daemon=True)
+        sender.start()
+
+        for line in client.makefile():
+            output.write(line)
+            output.flush()
+
+        sender.join()
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Solve sudokus and DIMACS problems as a long-lived service.')
+    parser.add_argument('--socket', default=None, help='listen on this Unix socket instead of stdin')
+    parser.add_argument('--connect', default=None, help='send the requests on stdin to the server on this socket')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--amo', action='store_true',
+                        help='warm up the rule bases with native at-most-one constraints')
+    parser.add_argument('--cache', type=int, default=CAPACITY,
+                        help='number of sudoku solutions every worker keeps, 0 for none')
+    args = parser.parse_args()
+
+    if args.connect:
+        connect(args.connect, sys.stdin)
+    else:
+        serve(args.socket, args.workers, args.amo, args.cache)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+'''
+    An incremental solver: clauses are added once, and the formula is solved
+    any number of times under different assumptions.
+
+    The clause database and the watched literals are kept between calls, and
+    so are the clauses learned by CDCL and its VSIDS activities. A learned
+    clause never depends on the assumptions, because those are decided on
+    levels of their own, so it stays valid for the next call. With one of the
+    DPLL heuristics, the heuristic scores are kept as well, until a clause is
+    added.
+
+        solver = Solver(heuristic="CDCL")
+        solver.add_clause([1, 2])
+        solver.add_clause([-1, 2])
+        if solver.solve(assumptions=[-2]):
+            print(solver.get_model())
+'''
+
+from collections import Counter
+
+from budget import UNKNOWN
+from cardinality import find_at_most_one
+from cdcl import CDCL_algorithm
+from dpll import DP_algorithm, has_tautology, heuristic_scores
+from vsids import VSIDS, initial_scores
+from watched import WatchedFormula
+
+# when more clauses than this have been learned, all but the short ones are
+# forgotten, so that propagation does not slow down over many calls
+MAX_LEARNED = 2000
+MAX_KEPT_SIZE = 2
+
+
+class Solver(object):
+
+    def __init__(self, clauses=(), heuristic="CDCL", restarts=None, backend=None, cardinality=False):
+
+        self.heuristic = heuristic
+        self.restarts = restarts
+        self.backend = backend
+
+        self.formula = WatchedFormula(())
+
+        # built when they are first needed, and again after clauses are added
+        self.scores = None
+        self.vsids = None
+
+        self.model = None
+
+        # the metrics of the last call
+        self.metrics = Counter()
+
+        # the pairwise at-most-one groups among the clauses become constraints
+        groups = []
+
+        if cardinality:
+            clauses, groups = find_at_most_one(clauses)
+
+        for clause in clauses:
+            self.add_clause(clause)
+
+        for group in groups:
+            self.add_at_most(group, 1)
+
+    def add_clause(self, clause):
+
+        '''Add a clause. Tautologies are left out, as are duplicate literals.'''
+
+        clause = list(dict.fromkeys(clause))
+
+        if has_tautology(clause):
+            return
+
+        self.formula.add_clause(clause)
+
+        # the heuristic scores count every clause, so they start over
+        self.scores = None
+
+    def add_at_most(self, literals, bound):
+
+        '''Add the constraint that at most bound of the literals are true. It is
+        propagated natively, instead of as clauses (see watched.py).'''
+
+        self.formula.add_at_most(literals, bound)
+
+    def add_exactly_one(self, literals):
+
+        '''Add the constraint that exactly one of the literals is true: a clause
+        for at least one, and a native constraint for at most one.'''
+
+        self.add_clause(literals)
+        self.add_at_most(literals, 1)
+
+    def solve(self, assumptions=(), metrics=None, budget=None):
+
+        '''Solve the clauses with the assumptions as extra unit clauses. Returns
+        True if they are satisfiable, in which case get_model() gives the
+        assignment, False if they are not, and None if the budget (see
+        budget.py) ran out first. The assumptions themselves are forgotten
+        afterwards. The metrics of the search are counted in the given
+        Counter, if any.'''
+
+        formula = self.formula
+        heuristic = self.heuristic
+
+        if metrics is None:
+            metrics = Counter()
+
+        self.metrics = metrics
+        propagations = formula.propagations
+
+        try:
+            if heuristic == "CDCL":
+
+                if self.vsids is None:
+                    variables = set(abs(literal) for literal in formula.clauses.literals)
+                    self.vsids = VSIDS(variables, *initial_scores(formula.clauses))
+
+                solution = CDCL_algorithm(formula, metrics, assumptions, self.restarts, self.vsids,
+                                          budget)
+
+            else:
+
+                if self.scores is None:
+                    self.scores = heuristic_scores(formula.clauses, heuristic, self.backend)
+
+                solution = DP_algorithm(formula, heuristic, metrics, assumptions, self.scores,
+                                        self.restarts, budget=budget)
+
+        # leave the formula without assignments for the next call
+        finally:
+            metrics['propagations'] += formula.propagations - propagations
+            formula.undo(0)
+
+        if sum(formula.clauses.learned) > MAX_LEARNED:
+            self.forget_learned()
+
+        if solution is UNKNOWN:
+            self.model = None
+            return None
+
+        # without any clauses, constraints or assumptions there is nothing to assign
+        satisfiable = bool(solution) or (len(formula.clauses) == 0 and not formula.constraints and
+                                         not assumptions)
+
+        self.model = list(solution) if satisfiable else None
+
+        return satisfiable
+
+    def forget_learned(self):
+
+        '''Rebuild the formula with the added clauses and constraints, and only
+        the short learned clauses. The VSIDS activities are kept.'''
+
+        clauses = self.formula.clauses
+        formula = WatchedFormula(())
+
+        for index in range(len(clauses)):
+
+            learned = clauses.learned[index]
+
+            if not learned or clauses.sizes[index] <= MAX_KEPT_SIZE:
+                formula.add_clause(clauses[index], learned)
+
+        for constraint, bound in zip(self.formula.constraints, self.formula.bounds):
+            formula.add_at_most(constraint, bound)
+
+        self.formula = formula
+        self.scores = None
+
+    def get_model(self):
+
+        '''The assigned literals of the last successful call, or None if the
+        last call found no solution.'''
+
+        return self.model
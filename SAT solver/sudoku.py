@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+'''
+    Solve sudoku puzzles given as strings, without writing DIMACS files.
+
+    Usage: python sudoku.py heuristic [puzzle | file | -] [bitmask] [cache[=FILE]]
+
+    A puzzle is one line of 81 characters, read row by row, with a digit for
+    every given and any other character (usually '.' or '0') for a blank, as
+    in the files in 'sudokus'. The argument may be a single puzzle, a file with
+    one puzzle per line, or '-' (or nothing) to read puzzles from stdin. For
+    every puzzle, its solution is printed as a line of 81 digits, or an empty
+    line if it has none. A line that is not a sudoku is reported on stderr,
+    and gets an empty line as well.
+
+    The puzzles are encoded directly as assumptions on the shared sudoku rules
+    (see rulebase.py), so the rules are parsed only once.
+
+    Larger sudokus, such as a 16 x 16 hexadoku of 256 characters with the
+    values 1-9 and A-G (see grid.py), are solved with their rules propagated
+    as bitmasks instead (see bitmask.py); the option 'bitmask' does so for
+    9 x 9 puzzles as well.
+
+    With the option 'cache', a puzzle that is equivalent to an earlier one, up
+    to relabelling, reordering rows and columns and transposing, is answered
+    from the solution of that one (see cache.py); with cache=FILE, the
+    solutions are kept in that file from run to run.
+'''
+
+import os
+import sys
+
+from bitmask import solve_grid
+from cache import SolutionCache
+from grid import grid_size, solution_string
+from rulebase import puzzle_givens, shared_rule_base
+
+USAGE = 'usage: python sudoku.py heuristic [puzzle | file | -] [bitmask] [cache[=FILE]]'
+
+
+def solve_sudoku(puzzle, heuristic="CDCL", rule_base=None, metrics=None, backend=None):
+
+    '''Solve a puzzle given as a string of N * N characters. Returns the
+    solution as a string of as many symbols, or None if the puzzle has no
+    solution. A 9 x 9 puzzle is solved with the rule base unless the backend
+    is 'bitmask'; other sizes always are solved with bitmasks. Without a rule
+    base, the one shared by this process is used (see rulebase.py).'''
+
+    puzzle = puzzle.strip()
+
+    if grid_size(puzzle) != 9 or backend == "bitmask":
+        return solve_grid(puzzle, heuristic, metrics)
+
+    if rule_base is None:
+        rule_base = shared_rule_base()
+
+    solution = rule_base.solve(puzzle_givens(puzzle), heuristic, metrics)
+
+    if not solution:
+        return None
+
+    return solution_string(solution)
+
+
+def solve_sudokus(puzzles, heuristic="CDCL", rule_base=None, backend=None, cache=None):
+
+    '''Solve a sequence of puzzle strings with one rule base, yielding the
+    solutions in the same order. Empty lines are skipped. With a
+    SolutionCache, puzzles equivalent to one in the cache are not searched.'''
+
+    if rule_base is None and backend != "bitmask":
+        rule_base = shared_rule_base()
+
+    for puzzle in puzzles:
+
+        if not puzzle.strip():
+            continue
+
+        if cache is not None:
+            yield cache.solve(puzzle, lambda puzzle: solve_sudoku(puzzle, heuristic, rule_base, backend=backend))
+        else:
+            yield solve_sudoku(puzzle, heuristic, rule_base, backend=backend)
+
+
+def read_puzzles(argument):
+
+    '''The puzzles named by the command line argument: a puzzle, a file or stdin.'''
+
+    if argument is None or argument == '-':
+        return sys.stdin
+
+    if os.path.isfile(argument):
+        return open(argument)
+
+    return [argument]
+
+
+def main():
+
+    heuristic = sys.argv[1]
+    argument = sys.argv[2] if len(sys.argv) > 2 else None
+    backend = None
+    cache = None
+
+    for option in sys.argv[3:]:
+
+        name, _, filename = option.partition('=')
+
+        if name == "cache":
+            cache = SolutionCache(filename=filename or None)
+        elif option == "bitmask":
+            backend = option
+        else:
+            sys.exit('Unknown option %r\n%s' % (option, USAGE))
+
+    puzzles = read_puzzles(argument)
+
+    def solve(puzzle):
+        return solve_sudoku(puzzle, heuristic, backend=backend)
+
+    try:
+        for number, puzzle in enumerate(puzzles, 1):
+
+            if not puzzle.strip():
+                continue
+
+            # a line that is not a sudoku gets an empty answer, and the rest
+            # of the batch goes on
+            try:
+                solution = cache.solve(puzzle, solve) if cache is not None else solve(puzzle)
+            except ValueError as error:
+                print('Line %d: %s' % (number, error), file=sys.stderr)
+                solution = None
+
+            print(solution or '')
+
+    finally:
+        if puzzles is not sys.stdin and hasattr(puzzles, 'close'):
+            puzzles.close()
+
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == '__main__':
+    main()
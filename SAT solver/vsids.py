@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+'''
+    The VSIDS decision heuristic (variable state independent decaying sum), in
+    its exponential form as used by MiniSat.
+
+    Every variable has an activity, which is bumped whenever the variable is
+    involved in a conflict. Instead of decaying all activities after every
+    conflict, the amount added by a bump grows, which has the same effect on
+    their order. The unassigned variables are kept in an indexed binary
+    max-heap on activity, so picking a decision takes O(log n).
+'''
+
+import matrix
+from clausedb import ClauseDatabase
+
+
+def initial_scores(clauses):
+
+    '''Static two-sided Jeroslow-Wang scores of the variables over the given
+    clauses, with the polarity that has the highest weight. These are used to
+    order the variables before any conflict has been seen.'''
+
+    # with NumPy, the weights of a clause database are summed in one go
+    if matrix.np is not None and isinstance(clauses, ClauseDatabase):
+        literal_counts = matrix.jw_scores(clauses)
+
+    else:
+        literal_counts = {}
+
+        for clause in clauses:
+            weight = 2 ** -len(clause)
+
+            for literal in clause:
+                literal_counts[literal] = literal_counts.get(literal, 0) + weight
+
+    activity = {}
+    polarity = {}
+
+    for literal in literal_counts:
+        var = abs(literal)
+        positive = literal_counts.get(var, 0)
+        negative = literal_counts.get(-var, 0)
+
+        activity[var] = positive + negative
+        polarity[var] = 1 if positive >= negative else -1
+
+    return activity, polarity
+
+
+class VSIDS(object):
+
+    '''Variable activities with an indexed max-heap of candidate variables.'''
+
+    def __init__(self, variables, activity=None, polarity=None, decay=0.95):
+
+        # initial activities, for instance static scores, only decide the
+        # order until the first conflicts have been seen
+        self.activity = dict((var, 0.0) for var in variables)
+
+        if activity:
+            self.activity.update(activity)
+
+        # the polarity a variable is decided with, positive by default
+        self.polarity = polarity if polarity is not None else {}
+
+        self.decay = decay
+        self.increment = 1.0
+
+        self.heap = []
+        self.positions = {}
+
+        for var in sorted(self.activity, key=lambda var: (-self.activity[var], var)):
+            self.insert(var)
+
+    def insert(self, var):
+
+        '''Put a variable back in the heap, for instance when it is unassigned.'''
+
+        if var in self.positions:
+            return
+
+        self.positions[var] = len(self.heap)
+        self.heap.append(var)
+        self.sift_up(self.positions[var])
+
+    def add_variable(self, var):
+
+        '''Make a variable available for decisions, also if it is new.'''
+
+        if var not in self.activity:
+            self.activity[var] = 0.0
+
+        self.insert(var)
+
+    def bump(self, var):
+
+        '''Increase the activity of a variable involved in a conflict.'''
+
+        activity = self.activity
+        activity[var] += self.increment
+
+        # rescale everything before the floating point range runs out
+        if activity[var] > 1e100:
+
+            for other in activity:
+                activity[other] *= 1e-100
+
+            self.increment *= 1e-100
+
+        if var in self.positions:
+            self.sift_up(self.positions[var])
+
+    def decay_activities(self):
+
+        '''Let all activities decay, by making future bumps count more.'''
+
+        self.increment /= self.decay
+
+    def next_literal(self, true_literals):
+
+        '''Take the most active unassigned variable from the heap and return it
+        with its preferred polarity, or None if every variable has a value.'''
+
+        while self.heap:
+
+            var = self.pop()
+
+            if var not in true_literals and -var not in true_literals:
+                return var * self.polarity.get(var, 1)
+
+        return None
+
+    def pop(self):
+
+        heap = self.heap
+        positions = self.positions
+
+        top = heap[0]
+        last = heap.pop()
+        del positions[top]
+
+        if heap:
+            heap[0] = last
+            positions[last] = 0
+            self.sift_down(0)
+
+        return top
+
+    def sift_up(self, position):
+
+        heap = self.heap
+        positions = self.positions
+        activity = self.activity
+
+        var = heap[position]
+
+        while position > 0:
+            parent = (position - 1) >> 1
+
+            if activity[heap[parent]] >= activity[var]:
+                break
+
+            heap[position] = heap[parent]
+            positions[heap[position]] = position
+            position = parent
+
+        heap[position] = var
+        positions[var] = position
+
+    def sift_down(self, position):
+
+        heap = self.heap
+        positions = self.positions
+        activity = self.activity
+
+        var = heap[position]
+        size = len(heap)
+
+        while True:
+            child = 2 * position + 1
+
+            if child >= size:
+                break
+
+            # take the more active of the two children
+            if child + 1 < size and activity[heap[child + 1]] > activity[heap[child]]:
+                child += 1
+
+            if activity[heap[child]] <= activity[var]:
+                break
+
+            heap[position] = heap[child]
+            positions[heap[position]] = position
+            position = child
+
+        heap[position] = var
+        positions[var] = position
@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+'''
+    Unit propagation with two watched literals, used by SAT.py and
+    scripts/SAT_for_analysis.py.
+
+    Instead of rebuilding the whole ruleset after every assignment, every
+    clause watches two of its literals. Only when one of those becomes false
+    is the clause visited, to look for a replacement watch. If none is found
+    the clause is unit (or in conflict). Assignments are kept on a trail so
+    they can be undone in place when the search backtracks. The clauses are
+    kept in a ClauseDatabase (clausedb.py) and addressed by index.
+
+    Next to clauses, the formula holds at-most-k constraints: at most k of a
+    group of literals may be true. These replace the pairwise binary clauses
+    of an at-most-one group (see cardinality.py). Every constraint counts its
+    true literals as they are assigned; once that count reaches k, all its
+    other literals are made false, and above k it is in conflict. The reason
+    of such an implication, and such a conflict, is not a clause index but a
+    tuple of the false literals that explain it, see explain().
+'''
+
+from array import array
+from collections import defaultdict
+
+from clausedb import ClauseDatabase
+
+
+class WatchedFormula(object):
+
+    '''A ruleset together with its current partial assignment.'''
+
+    def __init__(self, ruleset):
+
+        # the first two literals of every clause are its watched literals
+        self.clauses = ClauseDatabase()
+
+        # for every literal, the indices of the clauses watching it
+        self.watches = defaultdict(lambda: array('i'))
+
+        # the literals of clauses of length 1, these have nothing to watch
+        self.units = []
+
+        # the at-most-k constraints: their literals, their k and the number of
+        # their literals that are true, and for every literal its constraints
+        self.constraints = []
+        self.bounds = array('i')
+        self.true_counts = array('i')
+        self.constraint_occurrences = {}
+
+        # an empty clause in the input makes the problem unsatisfiable
+        self.has_empty_clause = False
+
+        # the literals that are currently true, in order of assignment
+        self.true_literals = set()
+        self.trail = []
+
+        # trail position up to which assignments have been propagated
+        self.propagated = 0
+
+        # the index of the clause the last propagation failed on, if any, or
+        # the explanation of a constraint in conflict
+        self.conflict = None
+
+        # the number of assignments propagated so far, for benchmarks
+        self.propagations = 0
+
+        # for every assigned variable, the decision level it was assigned at
+        # and the index of the clause that implied it (None for decisions)
+        self.decision_level = 0
+        self.levels = {}
+        self.reasons = {}
+
+        # an object with assign() and unassign() methods that is told about
+        # every change to the assignment, such as the heuristic scores
+        self.listener = None
+
+        for clause in ruleset:
+            self.add_clause(clause)
+
+    def add_clause(self, clause, learned=False):
+
+        '''Add a clause to the formula and start watching its first two literals.'''
+
+        clause = list(clause)
+        index = self.clauses.add(clause, learned)
+
+        if len(clause) == 0:
+            self.has_empty_clause = True
+
+        elif len(clause) == 1:
+            self.units.append(clause[0])
+
+        else:
+            self.watches[clause[0]].append(index)
+            self.watches[clause[1]].append(index)
+
+        return index
+
+    def add_at_most(self, literals, bound):
+
+        '''Add the constraint that at most bound of the literals are true, before
+        the search. Returns its index, or None if it holds anyway, or has
+        been added as unit clauses (when bound is 0).'''
+
+        literals = tuple(dict.fromkeys(literals))
+
+        if bound >= len(literals):
+            return None
+
+        if bound <= 0:
+            for literal in literals:
+                self.add_clause([-literal])
+
+            return None
+
+        index = len(self.constraints)
+
+        self.constraints.append(literals)
+        self.bounds.append(bound)
+        self.true_counts.append(sum(1 for literal in literals if literal in self.true_literals))
+
+        for literal in literals:
+            self.constraint_occurrences.setdefault(literal, []).append(index)
+
+        return index
+
+    def explain(self, reason):
+
+        '''The literals of a reason or conflict: a clause, given by its index,
+        or the explanation of a constraint.'''
+
+        if isinstance(reason, tuple):
+            return reason
+
+        return self.clauses[reason]
+
+    def constrains(self, literal):
+
+        '''Whether a literal occurs in a constraint, so that it is not pure
+        even if its negation occurs in no clause.'''
+
+        return literal in self.constraint_occurrences
+
+    def complete_constraints(self):
+
+        '''The literals that make the unassigned literals of the constraints
+        false, which cannot break any of them. Returns those and None, or,
+        if a variable occurs unassigned in both polarities, None and one of
+        its literals, to be decided on first.'''
+
+        true_literals = self.true_literals
+        completion = set()
+
+        for constraint in self.constraints:
+            for literal in constraint:
+
+                if literal in true_literals or -literal in true_literals:
+                    continue
+
+                if literal in completion:
+                    return None, literal
+
+                completion.add(-literal)
+
+        return sorted(completion, key=abs), None
+
+    def assign(self, literal, reason=None):
+
+        '''Make a literal true. Its consequences are found by propagate().'''
+
+        self.true_literals.add(literal)
+        self.trail.append(literal)
+        self.levels[abs(literal)] = self.decision_level
+        self.reasons[abs(literal)] = reason
+
+        if self.listener is not None:
+            self.listener.assign(literal)
+
+        if self.constraint_occurrences:
+            for index in self.constraint_occurrences.get(literal, ()):
+                self.true_counts[index] += 1
+
+    def undo(self, position):
+
+        '''Undo all assignments made after the given trail position.'''
+
+        trail = self.trail
+        true_literals = self.true_literals
+        listener = self.listener
+        occurrences = self.constraint_occurrences
+        true_counts = self.true_counts
+
+        while len(trail) > position:
+            literal = trail.pop()
+            true_literals.discard(literal)
+
+            if listener is not None:
+                listener.unassign(literal)
+
+            if occurrences:
+                for index in occurrences.get(literal, ()):
+                    true_counts[index] -= 1
+
+        # everything left on the trail has already been propagated
+        self.propagated = min(self.propagated, position)
+
+    def propagate(self):
+
+        '''Propagate all assignments on the trail. Returns the index of a
+        conflicting clause, or the explanation of a conflicting constraint,
+        or None if no conflict was found.'''
+
+        trail = self.trail
+        true_literals = self.true_literals
+        watches = self.watches
+        occurrences = self.constraint_occurrences
+
+        literals = self.clauses.literals
+        starts = self.clauses.starts
+        sizes = self.clauses.sizes
+
+        self.conflict = None
+        first = self.propagated
+
+        while self.propagated < len(trail):
+
+            false_literal = -trail[self.propagated]
+            self.propagated += 1
+
+            watching = watches[false_literal]
+            kept = array('i')
+
+            for position, index in enumerate(watching):
+
+                start = starts[index]
+                other = literals[start]
+
+                # make sure the falsified literal is the second watch
+                if other == false_literal:
+                    other = literals[start + 1]
+                    literals[start] = other
+                    literals[start + 1] = false_literal
+
+                # the clause is satisfied by its other watch, nothing to do
+                if other in true_literals:
+                    kept.append(index)
+                    continue
+
+                # look for a literal that is not false to watch instead
+                for k in range(start + 2, start + sizes[index]):
+                    literal = literals[k]
+
+                    if -literal not in true_literals:
+                        literals[start + 1] = literal
+                        literals[k] = false_literal
+                        watches[literal].append(index)
+                        break
+
+                else:
+                    # no replacement: the clause is unit or conflicting
+                    kept.append(index)
+
+                    if -other in true_literals:
+                        kept.extend(watching[position + 1:])
+                        watches[false_literal] = kept
+                        self.conflict = index
+                        self.propagations += self.propagated - first
+                        return index
+
+                    self.assign(other, index)
+
+            watches[false_literal] = kept
+
+            # the constraints with the literal that became true may be full
+            if occurrences and -false_literal in occurrences:
+
+                conflict = self.propagate_constraints(-false_literal)
+
+                if conflict is not None:
+                    self.conflict = conflict
+                    self.propagations += self.propagated - first
+                    return conflict
+
+        self.propagations += self.propagated - first
+
+        return None
+
+    def propagate_constraints(self, literal):
+
+        '''Make the other literals of the full constraints with a true literal
+        false. Returns the explanation of a constraint with too many true
+        literals, or None.'''
+
+        true_literals = self.true_literals
+
+        for index in self.constraint_occurrences[literal]:
+
+            count = self.true_counts[index]
+
+            if count < self.bounds[index]:
+                continue
+
+            constraint = self.constraints[index]
+
+            # the true literals are why the others have to be false
+            explanation = tuple(-other for other in constraint if other in true_literals)
+
+            if count > self.bounds[index]:
+                return explanation
+
+            for other in constraint:
+                if other not in true_literals and -other not in true_literals:
+                    self.assign(-other, explanation)
+
+        return None
+
+    def residual(self, ruleset=None):
+
+        '''Return the clauses that are not yet satisfied, restricted to their
+        unassigned literals. This is the ruleset the heuristics work on. When
+        an earlier residual is given, only that one is filtered further.'''
+
+        if ruleset is None:
+            ruleset = self.clauses
+
+        true_literals = self.true_literals
+        false_literals = set(-literal for literal in true_literals)
+        residual = []
+
+        for clause in ruleset:
+
+            if not true_literals.isdisjoint(clause):
+                continue
+
+            if false_literals.isdisjoint(clause):
+                residual.append(clause)
+            else:
+                residual.append([literal for literal in clause if literal not in false_literals])
+
+        return residual